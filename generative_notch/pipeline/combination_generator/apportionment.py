@@ -0,0 +1,14 @@
+import numpy as np
+
+
+def apportion(weights: np.ndarray, count: int) -> np.ndarray:
+    """
+    Splits count into integer quotas proportional to weights using largest remainder method.
+    Ties of remainders are resolved in favour of the earlier weight.
+    :returns: quota of every weight, summing up to count
+    """
+    shares = np.asarray(weights, dtype=np.float64) / np.sum(weights) * count
+    quotas = np.floor(shares).astype(np.int64)
+    remainder_order = np.argsort(-(shares - quotas), kind='stable')
+    quotas[remainder_order[:count - quotas.sum()]] += 1
+    return quotas
@@ -1,4 +1,5 @@
 import pandas as pd
+from typing import Iterator, Optional
 from abc import ABC, abstractmethod
 from attrs import define
 
@@ -15,7 +16,26 @@ class CombinationGenerator(ABC):
     def run(self, df: pd.DataFrame) -> pd.DataFrame:
         pass
 
+    def iter_combinations(self, df: pd.DataFrame, batch_size: Optional[int] = 1) -> Iterator[pd.DataFrame]:
+        """
+        Yields generated combinations in batches, indexed by their position in the whole result.
+        Default implementation generates all combinations first, generators able to pick them one by one
+        should override it, so that the following stages can start earlier.
+
+        :param batch_size: count of combinations per batch, when not given, all combinations make a single batch
+        """
+        yield from split_into_batches(self.run(df), batch_size)
+
     # TODO DO I need to use save using interface method?
     @abstractmethod
     def save(self):
         pass
+
+
+def split_into_batches(combinations: pd.DataFrame, batch_size: Optional[int]) -> Iterator[pd.DataFrame]:
+    """
+    :param batch_size: count of combinations per batch, when not given, all combinations make a single batch
+    """
+    step = batch_size or max(len(combinations), 1)
+    for start in range(0, max(len(combinations), 1), step):
+        yield combinations.iloc[start:start + step]
@@ -0,0 +1,225 @@
+from math import prod
+from typing import Union, Optional
+from attrs import define, field
+import numpy as np
+import pandas as pd
+from .compatibility import compile_rules
+from ..encoded_table import EncodedRarityTable, is_categorical
+
+# Count of codes decoded at once when enumerating compatible combinations
+COMPATIBLE_CODES_CHUNK_SIZE = 2 ** 20
+
+
+@define
+class CombinationSpace:
+    """
+    Implicit cartesian product of traits of every feature.
+    Each combination is a mixed-radix integer (code) over per-feature trait indices, where the first feature
+    is the most significant digit, so the order of codes matches the order of `itertools.product`.
+    Combinations are never materialized unless explicitly decoded.
+
+    :param features: feature names, in order of appearance in the rarity table
+    :param traits: trait names per feature, in order of appearance in the rarity table
+    :param target_weights: target weight of every trait per feature
+    :param masks: allowed trait pairs of features constrained by compatibility rules, see `compile_rules`
+    :param categorical: decode combinations into categorical columns, with traits of the feature as categories
+    """
+    features: list[str]
+    traits: list[np.ndarray]
+    target_weights: list[np.ndarray]
+    masks: dict[tuple[int, int], np.ndarray] = field(factory=dict)
+    categorical: bool = False
+    radices: np.ndarray = field(init=False)
+    strides: list[int] = field(init=False)
+
+    def __attrs_post_init__(self):
+        self.radices = np.array([len(traits) for traits in self.traits], dtype=np.int64)
+        self.strides = [prod(int(radix) for radix in self.radices[i + 1:]) for i in range(len(self.radices))]
+
+    @classmethod
+    def from_rarity_table(
+            cls, rarity_table: pd.DataFrame,
+            feature_column_name: str, trait_column_name: str, weights_column_name: str,
+            rules: Optional[list[dict]] = None
+    ) -> 'CombinationSpace':
+        """
+        Builds the space from traits of the rarity table, traits of zero weight are dropped.
+        A table with categorical feature and trait columns (see `EncodedRarityTable`) is built from its codes,
+        and its combinations are decoded into categorical columns.
+        :param rules: compatibility rules forbidding pairs of traits, see `compile_rules`
+        """
+        if is_categorical(rarity_table[feature_column_name]) and is_categorical(rarity_table[trait_column_name]):
+            return cls.from_encoded_table(
+                EncodedRarityTable.from_rarity_table(
+                    rarity_table, feature_column_name, trait_column_name, weights_column_name
+                ),
+                rules=rules
+            )
+
+        features, traits, target_weights = [], [], []
+        for feature, sub_df in rarity_table.groupby(feature_column_name, sort=False):
+            sub_df = sub_df[sub_df[weights_column_name] > 0]
+            features.append(feature)
+            traits.append(sub_df[trait_column_name].to_numpy())
+            target_weights.append(sub_df[weights_column_name].to_numpy(dtype=np.float64))
+
+        return cls(
+            features=features, traits=traits, target_weights=target_weights,
+            masks=compile_rules(features, traits, rules)
+        )
+
+    @classmethod
+    def from_encoded_table(cls, encoded: EncodedRarityTable, rules: Optional[list[dict]] = None) -> 'CombinationSpace':
+        """
+        Builds the space from vocabulary and weights of the encoded table, traits of zero weight are dropped.
+        """
+        features, traits, target_weights = list(encoded.vocabulary.features), [], []
+        for feature_code, feature_traits in enumerate(encoded.vocabulary.traits):
+            weights = encoded.feature_weights(feature_code).astype(np.float64)
+            traits.append(feature_traits[weights > 0])
+            target_weights.append(weights[weights > 0])
+
+        return cls(
+            features=features, traits=traits, target_weights=target_weights,
+            masks=compile_rules(features, traits, rules), categorical=True
+        )
+
+    @property
+    def size(self) -> int:
+        """Count of all possible combinations, as python int so it does not overflow."""
+        return prod(int(radix) for radix in self.radices)
+
+    @property
+    def compatible_size(self) -> int:
+        """
+        Count of combinations satisfying compatibility rules, computed by contracting the masks without enumerating
+        the space. Exact as long as the space fits in int64.
+        """
+        if not self.masks:
+            return self.size
+
+        dtype = np.int64 if self.fits_int64 else np.float64
+        operands = []
+        for (first, second), mask in self.masks.items():
+            operands += [mask.astype(dtype), [first, second]]
+        for column, radix in enumerate(self.radices):
+            operands += [np.ones(radix, dtype=dtype), [column]]
+
+        return int(np.einsum(*operands, [], optimize='greedy'))
+
+    @property
+    def fits_int64(self) -> bool:
+        """Whether every code of the space can be represented as int64."""
+        return self.size <= np.iinfo(np.int64).max
+
+    @property
+    def index_dtype(self) -> np.dtype:
+        """Smallest integer type able to hold a trait index of any feature."""
+        return np.min_scalar_type(int(self.radices.max()) - 1 if len(self.radices) else 0)
+
+    def encode(self, indices) -> Union[np.ndarray, int]:
+        """
+        Encodes trait indices into combination codes.
+        :param indices: (F,) trait indices of a single combination or (N x F) matrix of them
+        :returns: python int for a single combination, int64 array otherwise
+        (array of python ints if the space does not fit in int64)
+        """
+        indices = np.asarray(indices)
+        if indices.ndim == 1:
+            return sum(int(index) * stride for index, stride in zip(indices, self.strides))
+
+        if not self.fits_int64:
+            return indices.astype(object) @ np.array(self.strides, dtype=object)
+
+        return indices.astype(np.int64) @ np.array(self.strides, dtype=np.int64)
+
+    def decode(self, codes) -> np.ndarray:
+        """
+        Decodes combination codes into trait indices.
+        :param codes: single code or array of codes
+        :returns: (F,) trait indices for a single code, (N x F) matrix of them otherwise
+        """
+        if np.ndim(codes) == 0:
+            code = int(codes)
+            return np.array(
+                [(code // stride) % int(radix) for stride, radix in zip(self.strides, self.radices)],
+                dtype=self.index_dtype
+            )
+
+        self.__assert_fits_int64()
+        codes = np.asarray(codes, dtype=np.int64)
+        result = np.empty((len(codes), len(self.radices)), dtype=self.index_dtype)
+        for column, (stride, radix) in enumerate(zip(self.strides, self.radices)):
+            result[:, column] = (codes // stride) % radix
+
+        return result
+
+    def decode_range(self, start: int, stop: int) -> np.ndarray:
+        """
+        Decodes a contiguous block of codes, allowing to iterate over the whole space in bounded memory.
+        :returns: (stop - start x F) matrix of trait indices
+        """
+        return self.decode(np.arange(start, min(stop, self.size), dtype=np.int64))
+
+    def is_compatible(self, indices) -> np.ndarray:
+        """
+        :param indices: (F,) trait indices of a single combination or (N x F) matrix of them
+        :returns: boolean mask telling which combinations satisfy compatibility rules
+        """
+        indices = np.asarray(indices).reshape(-1, len(self.features))
+        result = np.ones(len(indices), dtype=bool)
+        for (first, second), mask in self.masks.items():
+            result &= mask[indices[:, first], indices[:, second]]
+
+        return result
+
+    def compatible_codes(self) -> np.ndarray:
+        """
+        Enumerates codes of combinations satisfying compatibility rules, decoding the space chunk by chunk,
+        so incompatible combinations are never held in memory all at once.
+        :returns: ascending int64 codes
+        """
+        self.__assert_fits_int64()
+        if not self.masks:
+            return np.arange(self.size, dtype=np.int64)
+
+        return np.concatenate([np.empty(0, dtype=np.int64)] + [
+            np.arange(start, min(start + COMPATIBLE_CODES_CHUNK_SIZE, self.size), dtype=np.int64)[
+                self.is_compatible(self.decode_range(start, start + COMPATIBLE_CODES_CHUNK_SIZE))
+            ]
+            for start in range(0, self.size, COMPATIBLE_CODES_CHUNK_SIZE)
+        ])
+
+    def indices_from_frame(self, combinations: pd.DataFrame) -> np.ndarray:
+        """
+        Translates frame of trait names (one column per feature) into matrix of trait indices.
+        :returns: (N x F) matrix of trait indices
+        """
+        result = np.empty((len(combinations), len(self.features)), dtype=np.int64)
+        for column, (feature, traits) in enumerate(zip(self.features, self.traits)):
+            result[:, column] = pd.Categorical(combinations[feature], categories=traits).codes
+
+        if (result < 0).any():
+            raise ValueError('Combinations contain traits that are not present in the rarity table!')
+
+        return result.astype(self.index_dtype)
+
+    def to_frame(self, indices: np.ndarray) -> pd.DataFrame:
+        """
+        Translates matrix of trait indices into frame of trait names (one column per feature).
+        """
+        indices = np.asarray(indices).reshape(-1, len(self.features))
+        if self.categorical:
+            return pd.DataFrame({
+                feature: pd.Categorical.from_codes(indices[:, column], categories=traits)
+                for column, (feature, traits) in enumerate(zip(self.features, self.traits))
+            })
+
+        return pd.DataFrame({
+            feature: traits[indices[:, column]]
+            for column, (feature, traits) in enumerate(zip(self.features, self.traits))
+        })
+
+    def __assert_fits_int64(self):
+        if not self.fits_int64:
+            raise OverflowError(f'Combination space of size {self.size} cannot be vectorized with int64 codes')
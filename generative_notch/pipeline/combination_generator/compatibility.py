@@ -0,0 +1,77 @@
+import logging
+from typing import Optional, TYPE_CHECKING
+from attrs import define
+import numpy as np
+
+if TYPE_CHECKING:
+    from .combination_space import CombinationSpace
+
+
+@define
+class IncompatibleCombinations:
+    """
+    Set-like view of combinations of the space that break its compatibility rules. Lookups cost O(F^2)
+    per code and nothing is stored, so it can be treated as a set of excluded codes by every engine.
+    """
+    space: 'CombinationSpace'
+
+    def __contains__(self, code: int) -> bool:
+        return not self.space.is_compatible(self.space.decode(code))[0]
+
+    def contains_many(self, codes: np.ndarray) -> np.ndarray:
+        """
+        :returns: boolean mask telling which of the given codes are incompatible
+        """
+        if not self.space.fits_int64:
+            # Codes are python ints which cannot be decoded in a vectorized way
+            indices = np.empty((len(codes), len(self.space.features)), dtype=self.space.index_dtype)
+            for row, code in enumerate(codes):
+                indices[row] = self.space.decode(int(code))
+            return ~self.space.is_compatible(indices)
+
+        return ~self.space.is_compatible(self.space.decode(codes))
+
+
+def compile_rules(
+        features: list[str], traits: list[np.ndarray], rules: Optional[list[dict]]
+) -> dict[tuple[int, int], np.ndarray]:
+    """
+    Compiles compatibility rules into boolean masks of allowed trait pairs, one per pair of constrained features.
+    Every rule forbids combining traits of exactly two features, e.g. `{'Clan': 'dwarf', 'Holding': ['stick', 'axe']}`.
+    Traits missing in the rarity table (e.g. dropped because of zero weight) are ignored.
+    :returns: (first radix x second radix) masks keyed by pairs of feature columns, first column being the lower one
+    """
+    columns = {feature: column for column, feature in enumerate(features)}
+    masks = {}
+    for rule in rules or []:
+        unknown_features = [feature for feature in rule if feature not in columns]
+        if unknown_features:
+            raise ValueError(f'Compatibility rule {rule} refers to unknown features {unknown_features}')
+        if len(rule) != 2:
+            raise ValueError(f'Compatibility rule has to forbid traits of exactly two features, got {rule}')
+
+        (first, first_traits), (second, second_traits) = sorted(rule.items(), key=lambda item: columns[item[0]])
+        first_column, second_column = columns[first], columns[second]
+        mask = masks.setdefault(
+            (first_column, second_column),
+            np.ones((len(traits[first_column]), len(traits[second_column])), dtype=bool)
+        )
+        mask[np.ix_(
+            trait_positions(traits[first_column], first_traits, rule),
+            trait_positions(traits[second_column], second_traits, rule)
+        )] = False
+
+    return masks
+
+
+def trait_positions(traits: np.ndarray, forbidden, rule: dict) -> np.ndarray:
+    """
+    :param forbidden: single trait or list of them
+    :returns: indices of forbidden traits present in traits of the feature
+    """
+    forbidden = forbidden if isinstance(forbidden, list) else [forbidden]
+    positions = [position for position, trait in enumerate(traits) if trait in forbidden]
+    if len(positions) < len(forbidden):
+        logging.warning(f'Compatibility rule {rule} refers to traits missing in the rarity table, ignoring them')
+
+    return np.array(positions, dtype=np.int64)
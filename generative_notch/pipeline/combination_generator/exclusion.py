@@ -0,0 +1,133 @@
+from math import ceil, log
+from typing import Union
+from attrs import define, field
+import numpy as np
+import pandas as pd
+from .combination_space import CombinationSpace
+
+# Codes that do not fit in 64 bits are folded modulo this prime before hashing
+FOLD_MODULUS = 2 ** 64 - 59
+# Seed distinguishing the second hash of double hashing from the first one
+SECOND_HASH_SEED = np.uint64(0x9E3779B97F4A7C15)
+
+
+@define
+class BloomFilter:
+    """
+    Probabilistic set of combination codes, taking a fixed count of bits per code regardless of the size of the space.
+    Lookups never miss an added code, but report a code that was not added with the configured false positive rate.
+    Supports the same `in` / `add` protocol as a python set, plus vectorized lookups.
+    """
+    bit_count: int
+    hash_count: int
+    bits: np.ndarray = field(init=False)
+
+    def __attrs_post_init__(self):
+        self.bits = np.zeros((self.bit_count + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def from_capacity(cls, capacity: int, false_positive_rate: float) -> 'BloomFilter':
+        """
+        :param capacity: expected count of added codes
+        :param false_positive_rate: probability of reporting a code that was not added, once capacity is reached
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f'False positive rate has to be between 0 and 1, got {false_positive_rate}')
+
+        capacity = max(capacity, 1)
+        bit_count = max(64, ceil(-capacity * log(false_positive_rate) / log(2) ** 2))
+        return cls(bit_count=bit_count, hash_count=max(1, round(bit_count / capacity * log(2))))
+
+    def __contains__(self, code: int) -> bool:
+        return bool(self.contains_many([code])[0])
+
+    def add(self, code: int) -> None:
+        self.update([code])
+
+    def update(self, codes) -> None:
+        positions = self.__positions(codes).ravel()
+        np.bitwise_or.at(self.bits, positions >> 3, np.left_shift(1, positions & 7).astype(np.uint8))
+
+    def contains_many(self, codes) -> np.ndarray:
+        """
+        :returns: boolean mask telling which of the given codes were (probably) added
+        """
+        positions = self.__positions(codes)
+        return ((self.bits[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1).all(axis=1).astype(bool)
+
+    def __positions(self, codes) -> np.ndarray:
+        """
+        :returns: (N x hash_count) bit positions of the given codes, derived by double hashing
+        """
+        keys = fold_codes(codes)
+        first, second = mix_hash(keys), mix_hash(keys ^ SECOND_HASH_SEED) | np.uint64(1)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            positions = (first[:, None] + steps[None, :] * second[:, None]) % np.uint64(self.bit_count)
+
+        return positions.astype(np.int64)
+
+
+def fold_codes(codes) -> np.ndarray:
+    """
+    :returns: codes as uint64 array, codes of spaces that do not fit in 64 bits are folded
+    """
+    codes = np.asarray(codes)
+    if codes.dtype == object:
+        return np.array([int(code) % FOLD_MODULUS for code in codes], dtype=np.uint64)
+
+    return codes.astype(np.int64).astype(np.uint64)
+
+
+def mix_hash(keys: np.ndarray) -> np.ndarray:
+    """
+    Vectorized SplitMix64 finalizer, spreads consecutive codes uniformly over 64 bits.
+    """
+    with np.errstate(over='ignore'):
+        keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+
+    return keys ^ (keys >> np.uint64(31))
+
+
+def contains_many(codes_set, codes) -> np.ndarray:
+    """
+    Vectorized lookup working with bitmaps, Bloom filters as well as python sets.
+    :returns: boolean mask telling which of the given codes are present in the set
+    """
+    if isinstance(codes_set, set):
+        return np.fromiter((code in codes_set for code in np.asarray(codes).tolist()), dtype=bool, count=len(codes))
+
+    return codes_set.contains_many(codes)
+
+
+def load_excluded_codes(
+        space: CombinationSpace, collections: list[Union[str, pd.DataFrame]]
+) -> np.ndarray:
+    """
+    Encodes combinations of previously generated collections, so they can be excluded from the space.
+    Combinations containing traits missing in the rarity table or breaking its compatibility rules cannot collide
+    with new ones, so they are skipped.
+    :param collections: frames or CSV filepaths of combinations, containing a column per feature
+    :returns: unique codes of the combinations, int64 array (array of python ints if the space does not fit in int64)
+    """
+    codes = []
+    for collection in collections:
+        if isinstance(collection, str):
+            collection = pd.read_csv(collection)
+
+        missing_features = [feature for feature in space.features if feature not in collection.columns]
+        if missing_features:
+            raise ValueError(f'Excluded collection does not contain features {missing_features}')
+
+        indices = np.column_stack([
+            pd.Categorical(collection[feature], categories=traits).codes
+            for feature, traits in zip(space.features, space.traits)
+        ]).reshape(-1, len(space.features))
+        indices = indices[(indices >= 0).all(axis=1)]
+        codes.append(np.asarray(space.encode(indices[space.is_compatible(indices)])).reshape(-1))
+
+    if not codes:
+        return np.empty(0, dtype=np.int64 if space.fits_int64 else object)
+
+    return np.unique(np.concatenate(codes))
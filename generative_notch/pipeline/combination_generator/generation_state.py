@@ -0,0 +1,330 @@
+import os
+import json
+from itertools import combinations
+from typing import Union, Optional
+from attrs import define, field
+import numpy as np
+import pandas as pd
+from .combination_space import CombinationSpace
+from .exclusion import BloomFilter, contains_many
+from .compatibility import IncompatibleCombinations
+
+# Spaces up to this size track used combinations in a bitmap (1 GiB at most), bigger ones in a hash set
+BITMAP_MAX_SIZE = 2 ** 33
+# Name of the checkpoint file, used when generator's save filepath points to a directory
+CHECKPOINT_FILENAME = 'generation_checkpoint.npz'
+# Name of the recorded distribution error artifact, written when generator's save filepath points to a directory
+DISTRIBUTION_ERROR_FILENAME = 'distribution_error.json'
+
+
+@define
+class UsedBitmap:
+    """
+    Set of used combination codes stored as one bit per combination of the space.
+    Supports the same `in` / `add` protocol as a python set, plus vectorized lookups.
+    """
+    size: int
+    bits: np.ndarray = field(init=False)
+
+    def __attrs_post_init__(self):
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def __contains__(self, code: int) -> bool:
+        return bool((self.bits[code >> 3] >> (code & 7)) & 1)
+
+    def __len__(self) -> int:
+        return int(np.unpackbits(self.bits).sum())
+
+    def add(self, code: int) -> None:
+        self.bits[code >> 3] |= np.uint8(1 << (code & 7))
+
+    def update(self, codes) -> None:
+        codes = np.asarray(codes, dtype=np.int64)
+        np.bitwise_or.at(self.bits, codes >> 3, np.left_shift(1, codes & 7).astype(np.uint8))
+
+    def contains_many(self, codes: np.ndarray) -> np.ndarray:
+        """
+        :returns: boolean mask telling which of the given codes are used
+        """
+        return ((self.bits[codes >> 3] >> (codes & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+@define
+class ExclusionIndex:
+    """
+    Codes of picked combinations together with codes excluded up front, e.g. of previously minted collections.
+    Supports the same protocol as the set of used codes it wraps, but added codes go only to the used ones.
+    """
+    used: Union[UsedBitmap, set[int]]
+    excluded: Union[UsedBitmap, BloomFilter, set[int], IncompatibleCombinations, 'ExclusionIndex']
+
+    def __contains__(self, code: int) -> bool:
+        return code in self.used or code in self.excluded
+
+    def __len__(self) -> int:
+        return len(self.used)
+
+    def add(self, code: int) -> None:
+        self.used.add(code)
+
+    def update(self, codes) -> None:
+        self.used.update(codes)
+
+    def contains_many(self, codes: np.ndarray) -> np.ndarray:
+        """
+        :returns: boolean mask telling which of the given codes are used or excluded
+        """
+        return contains_many(self.used, codes) | contains_many(self.excluded, codes)
+
+
+@define
+class GenerationState:
+    """
+    Array-backed state of an incremental generation run.
+    Updating it after a pick costs O(F) and does not allocate any frames, the result is converted
+    to a DataFrame only once, at the end.
+
+    :param space: combination space the combinations are picked from
+    :param capacity: maximal count of combinations that will be picked
+    :param counts: count of every trait per feature among picked combinations
+    :param buffer: preallocated (capacity x F) trait indices of picked combinations
+    :param size: count of combinations picked so far
+    :param used: codes of picked combinations, a bitmap for spaces that fit in memory, hash set otherwise;
+    wrapped in `ExclusionIndex` once some combinations are excluded or when the space has compatibility rules
+    :param error_every: when positive, distribution error is recorded whenever count of picked combinations
+    reaches a multiple of it
+    :param error_history: recorded (size, per-feature distribution error) pairs
+    :param track_pairs: whether co-occurrence of traits of every pair of features is counted as well
+    :param pair_counts: count of every pair of traits among picked combinations, keyed by pairs of feature columns,
+    only when pairs are tracked
+    """
+    space: CombinationSpace
+    capacity: int
+    error_every: int = 0
+    track_pairs: bool = False
+    counts: list[np.ndarray] = field(init=False)
+    buffer: np.ndarray = field(init=False)
+    size: int = field(init=False, default=0)
+    used: Union[UsedBitmap, set[int], ExclusionIndex] = field(init=False)
+    error_history: list[tuple[int, np.ndarray]] = field(init=False, factory=list)
+    pair_counts: dict[tuple[int, int], np.ndarray] = field(init=False, factory=dict)
+
+    def __attrs_post_init__(self):
+        self.counts = [np.zeros(len(traits), dtype=np.int64) for traits in self.space.traits]
+        self.buffer = np.empty((self.capacity, len(self.space.features)), dtype=self.space.index_dtype)
+        self.used = UsedBitmap(self.space.size) if self.space.size <= BITMAP_MAX_SIZE else set()
+        if self.space.masks:
+            self.used = ExclusionIndex(used=self.used, excluded=IncompatibleCombinations(self.space))
+        if self.track_pairs:
+            self.pair_counts = {
+                (first, second): np.zeros((self.space.radices[first], self.space.radices[second]), dtype=np.int64)
+                for first, second in combinations(range(len(self.space.features)), 2)
+            }
+
+    def add(self, indices, code: int = None) -> None:
+        """
+        Appends a picked combination.
+        :param indices: (F,) trait indices of the combination
+        :param code: code of the combination, computed from indices when not given
+        """
+        if self.size >= self.capacity:
+            raise IndexError(f'Generation state is full, its capacity is {self.capacity}')
+
+        self.buffer[self.size] = indices
+        self.size += 1
+        self.used.add(self.space.encode(indices) if code is None else code)
+
+        for column, trait in enumerate(indices):
+            self.counts[column][trait] += 1
+        for (first, second), pair_counts in self.pair_counts.items():
+            pair_counts[indices[first], indices[second]] += 1
+
+        if self.error_every and not self.size % self.error_every:
+            self.record_distribution_error()
+
+    def extend(self, indices: np.ndarray, codes=None) -> None:
+        """
+        Appends many picked combinations at once.
+        :param indices: (N x F) trait indices of the combinations
+        :param codes: codes of the combinations, computed from indices when not given
+        """
+        indices = np.asarray(indices).reshape(-1, len(self.space.features))
+        if self.size + len(indices) > self.capacity:
+            raise IndexError(f'Generation state is full, its capacity is {self.capacity}')
+
+        self.buffer[self.size:self.size + len(indices)] = indices
+        self.size += len(indices)
+        self.used.update(np.asarray(self.space.encode(indices) if codes is None else codes).tolist())
+
+        for column, counts in enumerate(self.counts):
+            counts += np.bincount(indices[:, column].astype(np.int64), minlength=len(counts))
+        for (first, second), pair_counts in self.pair_counts.items():
+            np.add.at(pair_counts, (indices[:, first], indices[:, second]), 1)
+
+        if self.error_every and (self.size // self.error_every) > (self.size - len(indices)) // self.error_every:
+            self.record_distribution_error()
+
+    def exclude(self, codes, false_positive_rate: Optional[float] = None) -> None:
+        """
+        Makes combinations unavailable for picking, without counting them as picked.
+        :param codes: codes of the excluded combinations
+        :param false_positive_rate: when given, excluded codes are kept in a Bloom filter of that false positive rate,
+        which takes a fraction of memory, but rejects some combinations that were not excluded
+        """
+        if false_positive_rate:
+            excluded = BloomFilter.from_capacity(len(codes), false_positive_rate)
+        elif self.space.size <= BITMAP_MAX_SIZE:
+            excluded = UsedBitmap(self.space.size)
+        else:
+            excluded = set()
+
+        excluded.update(np.asarray(codes).tolist())
+        self.used = ExclusionIndex(used=self.used, excluded=excluded)
+
+    def current_weights(self) -> list[np.ndarray]:
+        """
+        :returns: share of every trait among picked combinations, per feature
+        """
+        return [counts / self.size if self.size else counts for counts in self.counts]
+
+    def weight_differences(self) -> list[np.ndarray]:
+        """
+        :returns: difference between target and current weight of every trait, per feature
+        """
+        return [
+            target - current
+            for target, current in zip(self.space.target_weights, self.current_weights())
+        ]
+
+    def pair_differences(self) -> dict[tuple[int, int], np.ndarray]:
+        """
+        Target share of a pair of traits is the product of their target shares, as if features were independent.
+        :returns: difference between target and current share of every pair of traits, per pair of features
+        """
+        target_shares = [weights / weights.sum() for weights in self.space.target_weights]
+        return {
+            (first, second): np.outer(target_shares[first], target_shares[second]) - pair_counts / max(self.size, 1)
+            for (first, second), pair_counts in self.pair_counts.items()
+        }
+
+    def record_distribution_error(self) -> None:
+        """
+        Appends current distribution error - median absolute weight difference of every feature - to the history.
+        """
+        self.error_history.append(
+            (self.size, np.array([np.median(np.abs(difference)) for difference in self.weight_differences()]))
+        )
+
+    def distribution_error(self) -> pd.DataFrame:
+        """
+        :returns: recorded distribution error per feature, indexed by count of combinations picked at the time
+        """
+        return pd.DataFrame(
+            [errors for _, errors in self.error_history],
+            index=pd.Index([size for size, _ in self.error_history], name='combinations count', dtype=np.int64),
+            columns=self.space.features,
+            dtype=np.float64
+        )
+
+    def indices(self) -> np.ndarray:
+        """
+        :returns: (size x F) trait indices of picked combinations
+        """
+        return self.buffer[:self.size]
+
+    def to_frame(self, start: int = 0) -> pd.DataFrame:
+        """
+        :param start: position of the first combination to convert
+        :returns: frame of picked combinations, indexed by their position
+        """
+        return self.space.to_frame(self.indices()[start:]).set_axis(range(start, self.size))
+
+    def distribution_table(
+            self, feature_column_name: str = 'feature_name', trait_column_name: str = 'trait_name'
+    ) -> pd.DataFrame:
+        """
+        Reports achieved distribution against the target one, in the same shape as `construct_distribution_table`.
+        :returns: frame containing current and target weights per feature
+        """
+        index = pd.MultiIndex.from_arrays(
+            [
+                np.repeat(np.array(self.space.features, dtype=object), self.space.radices),
+                np.concatenate(self.space.traits)
+            ],
+            names=[feature_column_name, trait_column_name]
+        )
+        return (
+            pd.DataFrame({
+                'target_weight': np.concatenate(self.space.target_weights),
+                'current_weight': np.concatenate(self.current_weights()).astype(np.float64)
+            }, index=index)
+            .assign(weight_difference=lambda d: d.target_weight - d.current_weight)
+        )
+
+    def save(self, filepath: str, rng: Optional[np.random.Generator] = None) -> None:
+        """
+        Writes a checkpoint - picked combinations, per-trait counts, recorded distribution error and optionally
+        state of the random generator, as uncompressed numpy archive. The file is replaced atomically, so a crash never leaves a broken checkpoint.
+        """
+        temporary_filepath = f'{filepath}.tmp'
+        with open(temporary_filepath, 'wb') as file:
+            np.savez(
+                file,
+                features=np.array(self.space.features, dtype=str),
+                traits=np.concatenate(self.space.traits).astype(str),
+                radices=self.space.radices,
+                indices=self.indices(),
+                counts=np.concatenate(self.counts),
+                error_sizes=np.array([size for size, _ in self.error_history], dtype=np.int64),
+                errors=np.array(
+                    [errors for _, errors in self.error_history], dtype=np.float64
+                ).reshape(-1, len(self.space.features)),
+                rng_state=np.array(json.dumps(rng.bit_generator.state) if rng else '')
+            )
+        os.replace(temporary_filepath, filepath)
+
+    @classmethod
+    def load(
+            cls, filepath: str, space: CombinationSpace, capacity: int, rng: Optional[np.random.Generator] = None,
+            error_every: int = 0, track_pairs: bool = False
+    ) -> 'GenerationState':
+        """
+        Restores state from a checkpoint written by `save`. When rng is given, its state is restored as well.
+        """
+        with np.load(filepath) as checkpoint:
+            if (
+                    checkpoint['features'].tolist() != [str(feature) for feature in space.features]
+                    or checkpoint['radices'].tolist() != space.radices.tolist()
+                    or checkpoint['traits'].tolist() != np.concatenate(space.traits).astype(str).tolist()
+            ):
+                raise ValueError(f'Checkpoint {filepath} was created for a different rarity table!')
+
+            state = cls(space=space, capacity=capacity, error_every=error_every, track_pairs=track_pairs)
+            state.extend(checkpoint['indices'])
+            if not np.array_equal(np.concatenate(state.counts), checkpoint['counts']):
+                raise ValueError(f'Checkpoint {filepath} is corrupted, trait counts do not match combinations!')
+
+            # Checkpoints written before distribution error was saved keep the error recorded when extending
+            if 'error_sizes' in checkpoint:
+                state.error_history = list(zip(checkpoint['error_sizes'].tolist(), checkpoint['errors']))
+
+            if rng is not None and str(checkpoint['rng_state']):
+                rng.bit_generator.state = json.loads(str(checkpoint['rng_state']))
+
+        return state
+
+
+def resolve_checkpoint_filepath(save_filepath: str) -> str:
+    """
+    :returns: checkpoint filepath, placed inside save filepath if it is a directory
+    """
+    if os.path.isdir(save_filepath):
+        return os.path.join(save_filepath, CHECKPOINT_FILENAME)
+    return save_filepath
+
+
+def save_distribution_error(distribution_error: pd.DataFrame, filepath: str) -> None:
+    """
+    Writes recorded distribution error as JSON, one record per measurement.
+    """
+    distribution_error.reset_index().to_json(filepath, orient='records', indent=2)
@@ -0,0 +1,207 @@
+import logging
+from typing import Optional
+from attrs import define, field
+import numpy as np
+import pandas as pd
+from ..table_preprocessor.rescale_target_weights import normalize_weights_in_groups
+from .combination_generator import CombinationGenerator
+from .combination_space import CombinationSpace
+from .generation_state import GenerationState, ExclusionIndex
+from .exclusion import load_excluded_codes
+from .apportionment import apportion
+from .target_weight_based import find_best_unused_combination
+
+# Random swaps tried in search of one that frees both combinations, before a colliding one is accepted
+SWAP_ATTEMPTS_BEFORE_EVICTION = 32
+
+
+@define
+class QuotaBasedCombinationGenerator(CombinationGenerator):
+    """
+    Generates combinations with marginal distribution matching the rarity table as exactly as possible.
+    Target weights are first apportioned into integer count of every trait, then unique combinations are assembled
+    by filling those quotas feature by feature. Collisions are repaired by swapping traits between combinations,
+    which keeps the quotas intact, so every trait count is within 1 of its target share of n.
+    If quotas cannot be met by unique combinations (n close to the size of the space), the remaining duplicates
+    are replaced by the best matching unused combinations, which gives up the exactness of marginals.
+    When n is equal to -1, will generate all possible combinations.
+
+    :param seed: seed of the random generator, the same seed produces the same combinations
+    :param max_repair_attempts: count of swaps tried per colliding combination before it gets replaced
+    :param excluded_collections: frames or CSV filepaths of previously generated collections, their combinations
+    are repaired like collisions
+    :param exclusion_false_positive_rate: when given, excluded combinations are kept in a Bloom filter of that
+    false positive rate instead of an exact index
+    :param report: achieved vs target distribution of the last run
+    """
+
+    table_config: dict
+    seed: Optional[int] = None
+    max_repair_attempts: int = 100
+    excluded_collections: list = field(factory=list)
+    exclusion_false_positive_rate: Optional[float] = None
+    report: pd.DataFrame = field(init=False, default=None)
+
+    def run(self, rarity_table: pd.DataFrame) -> pd.DataFrame:
+        space = CombinationSpace.from_rarity_table(
+            rarity_table=normalize_weights_in_groups(
+                df=rarity_table,
+                group_column_name=self.table_config['feature_column_name'],
+                weights_column_name=self.table_config['weights_column_name']
+            ),
+            feature_column_name=self.table_config['feature_column_name'],
+            trait_column_name=self.table_config['trait_column_name'],
+            weights_column_name=self.table_config['weights_column_name'],
+            rules=self.table_config.get('rules')
+        )
+        excluded_codes = load_excluded_codes(space, self.excluded_collections)
+        max_combinations = space.compatible_size - len(excluded_codes)
+
+        count = max_combinations if self.n == -1 else self.n
+        if count > max_combinations:
+            raise ValueError(f'Cannot generate {count} combinations, possible count is {max_combinations}')
+
+        state = GenerationState(space=space, capacity=count)
+        if len(excluded_codes):
+            state.exclude(excluded_codes, self.exclusion_false_positive_rate)
+
+        rng = np.random.default_rng(self.seed)
+        if count == max_combinations:
+            # Every available combination is used, so the quotas are given by the space itself
+            codes = np.arange(space.size, dtype=np.int64)
+            indices = space.decode(rng.permutation(codes[~state.used.contains_many(codes)]))
+        else:
+            indices = assemble_combinations_from_quotas(space=space, count=count, rng=rng)
+            duplicates = repair_collisions(
+                indices=indices, space=space, rng=rng, max_attempts=self.max_repair_attempts, excluded=state.used
+            )
+            if duplicates:
+                logging.warning(f'Quotas cannot be met by unique combinations, replacing {len(duplicates)} duplicates')
+                replace_duplicates(indices=indices, space=space, rows=duplicates, excluded=state.used)
+
+        state.extend(indices)
+
+        self.report = state.distribution_table(
+            feature_column_name=self.table_config['feature_column_name'],
+            trait_column_name=self.table_config['trait_column_name']
+        )
+        logging.debug(f'Done, max distribution error: {self.report.weight_difference.abs().max()}')
+
+        return state.to_frame()
+
+    def save(self):
+        pass
+
+
+def assemble_combinations_from_quotas(space: CombinationSpace, count: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Fills every feature column with its traits repeated according to their quotas, in random order.
+    :returns: (count x F) trait indices, possibly containing duplicated combinations
+    """
+    result = np.empty((count, len(space.features)), dtype=space.index_dtype)
+    for column, weights in enumerate(space.target_weights):
+        quotas = apportion(weights, count)
+        result[:, column] = rng.permutation(np.repeat(np.arange(len(weights)), quotas))
+
+    return result
+
+
+def repair_collisions(
+        indices: np.ndarray, space: CombinationSpace, rng: np.random.Generator, max_attempts: int,
+        excluded=frozenset()
+) -> list[int]:
+    """
+    Makes combinations unique in place by swapping a trait of every duplicate with another random combination.
+    Swapping keeps count of every trait unchanged. When no swap frees both combinations, the duplicate is moved
+    to a free code anyway and the combination it swapped with becomes the duplicate to repair (eviction),
+    which allows to escape densely packed regions of the space.
+    :param excluded: codes of excluded combinations, combinations colliding with them are repaired as duplicates
+    :returns: rows that are still duplicated or excluded after all attempts were used
+    """
+    codes = space.encode(indices).tolist()
+    occurrences: dict[int, int] = {}
+    duplicates = []
+    for row, code in enumerate(codes):
+        if code in occurrences or code in excluded:
+            duplicates.append(row)
+        occurrences[code] = occurrences.get(code, 0) + 1
+
+    count, features_count = indices.shape
+    budget = max_attempts * len(duplicates)
+    while duplicates and budget > 0:
+        row = duplicates.pop()
+        eviction = None
+        for _ in range(SWAP_ATTEMPTS_BEFORE_EVICTION):
+            budget -= 1
+            other, column = int(rng.integers(count)), int(rng.integers(features_count))
+            trait, other_trait = int(indices[row, column]), int(indices[other, column])
+            if trait == other_trait:
+                continue
+
+            stride = space.strides[column]
+            code = codes[row] + (other_trait - trait) * stride
+            other_code = codes[other] + (trait - other_trait) * stride
+            if code in occurrences or code in excluded or code == other_code:
+                continue
+
+            if other_code not in occurrences and other_code not in excluded:
+                break
+            if eviction is None:
+                eviction = (other, column, code, other_code)
+        else:
+            if eviction is None:
+                duplicates.append(row)
+                continue
+            other, column, code, other_code = eviction
+            duplicates.append(other)
+
+        for old_code in (codes[row], codes[other]):
+            occurrences[old_code] -= 1
+            if not occurrences[old_code]:
+                del occurrences[old_code]
+
+        indices[row, column], indices[other, column] = indices[other, column], indices[row, column]
+        codes[row], codes[other] = code, other_code
+        for new_code in (code, other_code):
+            occurrences[new_code] = occurrences.get(new_code, 0) + 1
+
+    if not duplicates:
+        return duplicates
+
+    # Later swaps may have freed rows left over as duplicates, so they are found again from the final codes
+    seen = set()
+    duplicates = []
+    for row, code in enumerate(codes):
+        if code in seen or code in excluded:
+            duplicates.append(row)
+        seen.add(code)
+
+    return duplicates
+
+
+def replace_duplicates(indices: np.ndarray, space: CombinationSpace, rows: list[int], excluded=frozenset()):
+    """
+    Replaces given duplicated combinations in place with the best matching unused ones, as the greedy generator would.
+    Used only when quotas cannot be met by unique combinations, so the replacements break them as little as possible.
+    :param excluded: codes of excluded combinations, never used as replacements
+    """
+    codes = space.encode(indices).tolist()
+    used = ExclusionIndex(used=set(codes), excluded=excluded)
+    counts = [np.bincount(indices[:, column].astype(np.int64), minlength=len(traits))
+              for column, traits in enumerate(space.traits)]
+    summation_order = np.argsort(np.array(space.features, dtype=str), kind='stable')
+
+    for row in rows:
+        for column, trait in enumerate(indices[row]):
+            counts[column][trait] -= 1
+
+        weight_differences = [
+            target - current / (len(indices) - 1)
+            for target, current in zip(space.target_weights, counts)
+        ]
+        replacement, code = find_best_unused_combination(weight_differences, summation_order, space.strides, used)
+        indices[row] = replacement
+        used.add(code)
+
+        for column, trait in enumerate(replacement):
+            counts[column][trait] += 1
@@ -1,12 +1,33 @@
+import os
 import logging
-from attrs import define
+from functools import partial
+from attrs import define, field
+from attrs.validators import in_
 from itertools import product
+from heapq import heappush, heappop
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union, Optional, Iterator
 from tqdm import tqdm
 import numpy as np
 import pandas as pd
-import seaborn as sns
-from matplotlib import pyplot as plt
-from .combination_generator import CombinationGenerator
+from .combination_generator import CombinationGenerator, split_into_batches
+from .combination_space import CombinationSpace
+from .generation_state import (
+    GenerationState, UsedBitmap, resolve_checkpoint_filepath, save_distribution_error, DISTRIBUTION_ERROR_FILENAME
+)
+from .apportionment import apportion
+from .exclusion import load_excluded_codes, contains_many
+from .compatibility import compile_rules
+from .weighted_random import build_alias_table, draw_from_alias_table
+
+# Count of the best candidates considered per combination, when selecting multiple combinations per scoring pass
+SELECTION_CANDIDATES_PER_PICK = 64
+# Count of candidates checked at once when selecting multiple combinations per scoring pass
+SELECTION_BLOCK_SIZE = 1024
+# Count of batches of candidates drawn per pick of engine "pool" before concluding that the pool cannot be refilled
+POOL_REFILL_ATTEMPTS = 8
+# Minimal count of candidates drawn at once when refilling the pool of engine "pool"
+POOL_MIN_DRAWS = 64
 
 
 @define
@@ -14,72 +35,311 @@ class TargetWeightBasedCombinationGenerator(CombinationGenerator):
     """
     Generates combinations fitting distribution specified in the given  rarity table.
     When n is equal to -1, will generate all possible combinations.
+
+    :param engine: "pandas" scores remaining combinations using frame operations, "numpy" encodes them once
+    as an integer code matrix and scores them with per-feature lookup arrays, "search" enumerates combinations
+    in descending score order without scanning the space; all of them produce the same selection.
+    "pool" is approximate - every step scores only a bounded pool of candidates drawn at random from the target
+    weights and refilled as they get used, so its memory and step time do not depend on the size of the space;
+    it is meant for spaces far bigger than n, as unused combinations get hard to draw once the space is almost used up
+    :param processes: when greater than 1, the space is split into shards by traits of its highest-cardinality
+    feature, shards are generated in a process pool and merged, which is faster but less accurate
+    :param picks_per_pass: count of combinations picked per scoring pass of engine "numpy", the best ones
+    not sharing traits above the count their target weights allow; fewer passes at the cost of slightly
+    bigger distribution error
+    :param pair_weight: when positive, engine "numpy" also balances co-occurrence of every pair of traits
+    against the product of their target weights - difference of every pair of traits of a combination,
+    multiplied by pair weight, is added to its score, so over-represented pairs are avoided
+    :param pool_size: count of candidates scored per step of engine "pool"
+    :param seed: seed of the random generator of engine "pool", the same seed produces the same combinations
+    :param checkpoint_every: when positive, a checkpoint is saved to save filepath every that many combinations
+    :param resume: continue from the checkpoint in save filepath, producing the same result as an uninterrupted run
+    :param error_every: distribution error is recorded every that many picked combinations, by default
+    about 100 times per run
+    :param plot: plot recorded distribution error after the run, requires the optional "plot" extra
+    :param excluded_collections: frames or CSV filepaths of previously generated collections, their combinations
+    are removed from the space before sampling
+    :param exclusion_false_positive_rate: when given, excluded combinations are kept in a Bloom filter of that
+    false positive rate instead of an exact index, meant for histories of many millions of combinations;
+    some combinations that were not excluded get rejected too, so generating all of them is not possible
+    :param base_collection: frame or CSV filepath of an already minted collection to extend by n combinations;
+    its combinations are counted in one pass and yielded unchanged (with their index) before the new ones;
+    new ones are numbered on from the highest ID of its integer index, otherwise by their position after it
+    :param report: achieved vs target distribution of the last run
+    :param distribution_error: per-feature distribution error of the last run, recorded while generating;
+    also written as JSON to save filepath when it is a directory
     """
 
     table_config: dict
+    engine: str = field(default='numpy', validator=in_(['pandas', 'numpy', 'search', 'pool']))
+    processes: int = field(default=1)
+    @processes.validator
+    def __processes_validator(self, _, val: int):
+        if val < 1:
+            raise ValueError(f'Count of processes has to be positive, got {val}')
+        if val > 1 and self.engine in ['pandas', 'pool']:
+            raise ValueError(f'Engine [{self.engine}] does not support generating in multiple processes')
+
+    picks_per_pass: int = field(default=1)
+    @picks_per_pass.validator
+    def __picks_per_pass_validator(self, _, val: int):
+        if val < 1:
+            raise ValueError(f'Count of picks per pass has to be positive, got {val}')
+        if val > 1 and self.engine != 'numpy':
+            raise ValueError(f'Picking multiple combinations per pass is supported only by engine [numpy]')
+
+    pair_weight: float = field(default=0.0)
+    @pair_weight.validator
+    def __pair_weight_validator(self, _, val: float):
+        if val < 0:
+            raise ValueError(f'Pair weight cannot be negative, got {val}')
+        if val and (self.engine != 'numpy' or self.processes > 1):
+            raise ValueError(f'Balancing pairs of traits is supported only by engine [numpy] in a single process')
+
+    pool_size: int = field(default=4096)
+    @pool_size.validator
+    def __pool_size_validator(self, _, val: int):
+        if val < 1:
+            raise ValueError(f'Pool size has to be positive, got {val}')
+
+    seed: Optional[int] = None
+    checkpoint_every: int = 0
+    resume: bool = field(default=False)
+    @resume.validator
+    def __resume_validator(self, _, val: bool):
+        if (val or self.checkpoint_every) and (self.engine in ['pandas', 'pool'] or self.processes > 1):
+            raise ValueError(f'Checkpoints are supported only by engines [numpy] and [search] in a single process')
+
+    error_every: Optional[int] = None
+    plot: bool = False
+    excluded_collections: list = field(factory=list)
+    exclusion_false_positive_rate: Optional[float] = None
+    base_collection: Optional[Union[str, pd.DataFrame]] = None
+    report: pd.DataFrame = field(init=False, default=None)
+    distribution_error: pd.DataFrame = field(init=False, default=None)
+    _state: GenerationState = field(init=False, default=None, repr=False)
 
     def run(self, rarity_table: pd.DataFrame) -> pd.DataFrame:
-        possible_combinations = generate_possible_combinations(
+        result = pd.concat(list(self.iter_combinations(rarity_table, batch_size=None)))
+
+        if self.plot:
+            plot_distribution_error(self.distribution_error)
+
+        return result
+
+    def iter_combinations(
+            self, rarity_table: pd.DataFrame, batch_size: Optional[int] = 1
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields batches of combinations as soon as they are picked, indexed by their position in the whole result.
+        Engine "pandas" and generation in multiple processes yield only after all combinations are generated.
+        With base collection, it is yielded first, followed by n new combinations.
+        """
+        # Zero-weight traits would be picked only to fill up the space, so they are not part of it at all
+        rarity_table = rarity_table[rarity_table[self.table_config['weights_column_name']] > 0]
+        space = CombinationSpace.from_rarity_table(
             rarity_table=rarity_table,
             feature_column_name=self.table_config['feature_column_name'],
-            trait_column_name=self.table_config['trait_column_name']
+            trait_column_name=self.table_config['trait_column_name'],
+            weights_column_name=self.table_config['weights_column_name'],
+            rules=self.table_config.get('rules')
         )
-        max_combinations = len(possible_combinations)
+        excluded_codes = load_excluded_codes(space, self.excluded_collections)
+        base_collection = self.base_collection
+        if isinstance(base_collection, str):
+            base_collection = pd.read_csv(base_collection)
+        if base_collection is not None:
+            base_indices = space.indices_from_frame(base_collection)
+            reserved_codes = np.union1d(excluded_codes, load_excluded_codes(space, [base_collection]))
+        else:
+            base_indices = np.empty((0, len(space.features)), dtype=space.index_dtype)
+            reserved_codes = excluded_codes
+        prefix = len(base_indices)
+        # New combinations get IDs following the highest one of the base collection, so no ID is given twice
+        id_offset = 0
+        if prefix and pd.api.types.is_integer_dtype(base_collection.index):
+            id_offset = int(base_collection.index.max()) + 1 - prefix
+
+        def to_frame(start: int) -> pd.DataFrame:
+            frame = state.to_frame(start)
+            return frame.set_axis(frame.index + id_offset) if id_offset else frame
+
+        max_combinations = space.compatible_size - len(reserved_codes)
 
         count = max_combinations if self.n == -1 else self.n
         if count > max_combinations:
             raise ValueError(f'Cannot generate {count} combinations, possible count is {max_combinations}')
 
-        result = pd.DataFrame(columns=rarity_table[self.table_config['feature_column_name']].unique().tolist())
-        combinations_left_to_sample = possible_combinations.copy()
         distribution_table = construct_distribution_table(
             rarity_table=rarity_table,
             feature_column_name=self.table_config['feature_column_name'],
             trait_column_name=self.table_config['trait_column_name'],
             weights_column_name=self.table_config['weights_column_name']
         )
-
-        for _ in tqdm(range(count), desc='Generating combinations'):
-            best_matching_combination, remaining_combinations = extract_next_combination(
-                combinations=combinations_left_to_sample,
-                distribution_table=distribution_table,
+        error_every = self.error_every or max(1, count // 100)
+
+        if self.engine == 'pandas':
+            result = space.to_frame(base_indices)
+            if prefix:
+                distribution_table = update_distribution_table(
+                    distribution_table=distribution_table, combinations=result
+                )
+            combinations_left_to_sample = generate_possible_combinations(
+                rarity_table=rarity_table,
                 feature_column_name=self.table_config['feature_column_name'],
-                trait_column_name=self.table_config['trait_column_name']
+                trait_column_name=self.table_config['trait_column_name'],
+                rules=self.table_config.get('rules')
+            )
+            if len(reserved_codes):
+                state = GenerationState(space=space, capacity=0)
+                state.exclude(reserved_codes, self.exclusion_false_positive_rate)
+                combinations_left_to_sample = combinations_left_to_sample[
+                    ~state.used.contains_many(space.encode(space.indices_from_frame(combinations_left_to_sample)))
+                ].reset_index(drop=True)
+
+            for _ in tqdm(range(count), desc='Generating combinations'):
+                best_matching_combination, remaining_combinations = extract_next_combination(
+                    combinations=combinations_left_to_sample,
+                    distribution_table=distribution_table,
+                    feature_column_name=self.table_config['feature_column_name'],
+                    trait_column_name=self.table_config['trait_column_name']
+                )
+                combinations_left_to_sample = remaining_combinations
+                result = pd.concat([result, best_matching_combination], ignore_index=True)
+                distribution_table = update_distribution_table(
+                    distribution_table=distribution_table,
+                    combinations=result
+                )
+
+            state = GenerationState(space=space, capacity=prefix + count, error_every=error_every)
+            state.extend(base_indices)
+            for indices in space.indices_from_frame(result.iloc[prefix:]):
+                state.add(indices)
+
+            self.report = distribution_table
+            self.__record_distribution_error(state)
+            if prefix:
+                yield from split_into_batches(base_collection, batch_size)
+            # Decoded by the space, so that column types match the other engines
+            yield from split_into_batches(to_frame(prefix), batch_size)
+            return
+
+        track_pairs = self.pair_weight > 0
+        state = GenerationState(
+            space=space, capacity=prefix + count, error_every=error_every, track_pairs=track_pairs
+        )
+        checkpoint_filepath = resolve_checkpoint_filepath(self.save_filepath)
+        if self.resume and os.path.exists(checkpoint_filepath):
+            state = GenerationState.load(
+                checkpoint_filepath, space=space, capacity=prefix + count, error_every=error_every,
+                track_pairs=track_pairs
             )
-            combinations_left_to_sample = remaining_combinations
-            result = pd.concat([result, best_matching_combination], ignore_index=True)
-            distribution_table = update_distribution_table(
-                distribution_table=distribution_table,
-                combinations=result
+            logging.info(f'Resuming generation from checkpoint containing {state.size} combinations')
+            if state.size < prefix or not np.array_equal(state.indices()[:prefix], base_indices):
+                raise ValueError(f'Checkpoint {checkpoint_filepath} does not start with the base collection!')
+        else:
+            state.extend(base_indices)
+        if prefix:
+            yield from split_into_batches(base_collection, batch_size)
+        if state.size > prefix:
+            yield from split_into_batches(to_frame(prefix), batch_size)
+        if len(excluded_codes):
+            state.exclude(excluded_codes, self.exclusion_false_positive_rate)
+        self._state = state
+
+        if self.processes > 1:
+            generate = partial(generate_with_code_matrix, picks_per_pass=self.picks_per_pass) \
+                if self.engine == 'numpy' else generate_with_best_first_search
+            generate_in_shards(
+                state=state, count=count, generate=generate, processes=self.processes,
+                excluded_codes=reserved_codes, false_positive_rate=self.exclusion_false_positive_rate
             )
-
-        logging.debug(f'Done')
-
-        plot_distribution_error(
+            yield from split_into_batches(to_frame(prefix), batch_size)
+        else:
+            start = last_checkpoint_size = state.size
+            if self.engine == 'numpy':
+                picks = partial(iter_code_matrix, picks_per_pass=self.picks_per_pass, pair_weight=self.pair_weight)
+            elif self.engine == 'pool':
+                picks = partial(
+                    iter_candidate_pool, pool_size=self.pool_size, rng=np.random.default_rng(self.seed)
+                )
+            else:
+                picks = iter_best_first_search
+            for _ in picks(state, prefix + count - state.size):
+                if self.checkpoint_every and state.size - last_checkpoint_size >= self.checkpoint_every:
+                    self.save()
+                    last_checkpoint_size = state.size
+
+                if batch_size and state.size - start >= batch_size:
+                    yield to_frame(start)
+                    start = state.size
+
+            if start < state.size or (not count and not prefix):
+                yield to_frame(start)
+
+            if self.checkpoint_every:
+                self.save()
+
+        self.report = update_distribution_table(
             distribution_table=distribution_table,
-            combinations=result
+            combinations=state.to_frame()
         )
-
-        return result
+        self.__record_distribution_error(state)
+        if track_pairs:
+            logging.info(
+                f'Max pair distribution error: '
+                f'{max((np.abs(d).max() for d in state.pair_differences().values()), default=0.0)}'
+            )
+        logging.debug(f'Done')
 
     def save(self):
-        pass
+        """
+        Saves checkpoint of the current generation run.
+        """
+        if self._state is not None:
+            self._state.save(resolve_checkpoint_filepath(self.save_filepath))
+
+    def __record_distribution_error(self, state: GenerationState):
+        if state.size and (not state.error_history or state.error_history[-1][0] != state.size):
+            state.record_distribution_error()
+
+        self.distribution_error = state.distribution_error()
+        if os.path.isdir(self.save_filepath):
+            save_distribution_error(
+                self.distribution_error, os.path.join(self.save_filepath, DISTRIBUTION_ERROR_FILENAME)
+            )
 
 
 def generate_possible_combinations(
         rarity_table: pd.DataFrame,
-        feature_column_name: str, trait_column_name: str
+        feature_column_name: str, trait_column_name: str,
+        rules: Optional[list[dict]] = None
 ) -> pd.DataFrame:
-    """Generates all possible combinations using cartesian product
+    """Generates all possible combinations using cartesian product.
+    Materializes the whole space, use `CombinationSpace` to work with it implicitly.
+    :param rules: compatibility rules, combinations breaking them are skipped before being materialized
     :returns: product table of all traits per feature
     """
-    traits_per_feature = []
-    for trait, sub_df in rarity_table.groupby(feature_column_name, sort=False):
+    features, traits_per_feature = [], []
+    for feature, sub_df in rarity_table.groupby(feature_column_name, sort=False):
+        features.append(feature)
         traits_per_feature.append(sub_df[trait_column_name].values)
 
+    combinations = product(*(range(len(traits)) for traits in traits_per_feature))
+    masks = compile_rules(features, traits_per_feature, rules)
+    if masks:
+        combinations = (
+            combination for combination in combinations
+            if all(mask[combination[first], combination[second]] for (first, second), mask in masks.items())
+        )
+
+    indices = np.array(list(combinations), dtype=np.int64).reshape(-1, len(features))
     return pd.DataFrame(
-        list(product(*traits_per_feature)),
-        columns=rarity_table['feature_name'].unique()
+        {
+            feature: traits[indices[:, column]]
+            for column, (feature, traits) in enumerate(zip(features, traits_per_feature))
+        },
+        columns=features
     )
 
 
@@ -141,97 +401,458 @@ def extract_next_combination(
     return best_match, remaining_combinations
 
 
-def update_distribution_table(
-        distribution_table: pd.DataFrame, combinations: pd.DataFrame
-) -> pd.DataFrame:
+def score_code_matrix(
+        codes: np.ndarray, weight_differences: list[np.ndarray], summation_order: np.ndarray
+) -> np.ndarray:
     """
-    Updates weights frame
+    Gathers weight difference of every trait in the code matrix and sums it per combination.
+    Features are summed in the given order, so the floating point result matches the frame based scoring.
+    :returns: cumulative weights difference per combination
     """
-    result = distribution_table.copy()
+    score = np.zeros(len(codes), dtype=np.float64)
+    for column in summation_order:
+        score += weight_differences[column][codes[:, column]]
+    return score
 
-    # Update traits current distribution
-    for feature in combinations.columns:
-        distribution = combinations[feature].value_counts(normalize=True)
-        for trait in combinations[feature].unique():
-            result.at[(feature, trait), 'current_weight'] = distribution[trait]
 
-    # Update traits weights difference
-    return (
-        result
-        .assign(weight_difference=lambda d: d.target_weight - d.current_weight)
+def score_pairs(codes: np.ndarray, pair_differences: dict[tuple[int, int], np.ndarray]) -> np.ndarray:
+    """
+    Gathers difference of every pair of traits in the code matrix and sums it per combination, O(F^2) per combination.
+    :returns: cumulative pair differences per combination
+    """
+    score = np.zeros(len(codes), dtype=np.float64)
+    for (first, second), differences in pair_differences.items():
+        score += differences[codes[:, first], codes[:, second]]
+    return score
+
+
+def iter_code_matrix(
+        state: GenerationState, count: int, picks_per_pass: int = 1, pair_weight: float = 0.0
+) -> Iterator[np.ndarray]:
+    """
+    Greedy generation equivalent to repeated `extract_next_combination` calls,
+    performed over integer code matrix decoded once from the combination space instead of the frame of
+    remaining combinations. Ties are resolved in favour of the combination with the lowest code.
+    :param picks_per_pass: count of combinations picked per scoring pass, see `select_diverse_top_k`
+    :param pair_weight: weight of pair differences in the score, requires state tracking pairs
+    :returns: iterator adding count of sampled combinations to the state, yielding trait indices of every one
+    """
+    space = state.space
+    candidate_codes = space.compatible_codes()
+    codes = space.decode(candidate_codes)
+    summation_order = np.argsort(np.array(space.features, dtype=str), kind='stable')
+    target_shares = [weights / weights.sum() for weights in space.target_weights]
+    # Looked up once, then only the picked candidates are marked, as nothing else gets used meanwhile
+    used = state.used.contains_many(candidate_codes)
+
+    with tqdm(total=count, desc='Generating combinations') as progress:
+        target_size = state.size + count
+        while state.size < target_size:
+            score = score_code_matrix(codes, state.weight_differences(), summation_order)
+            if pair_weight:
+                score += pair_weight * score_pairs(codes, state.pair_differences())
+            score[used] = -np.inf
+
+            if picks_per_pass == 1:
+                selected = np.array([np.argmax(score)])
+            else:
+                k = min(picks_per_pass, target_size - state.size)
+                selected = select_diverse_top_k(
+                    score, codes, k, pass_capacities(state.counts, target_shares, state.size + k)
+                )
+
+            if not len(selected) or score[selected[0]] == -np.inf:
+                raise ValueError('All possible combinations have already been used!')
+            state.extend(codes[selected], candidate_codes[selected])
+            used[selected] = True
+            progress.update(len(selected))
+            yield from codes[selected]
+
+
+def pass_capacities(counts: list[np.ndarray], target_shares: list[np.ndarray], size: int) -> list[np.ndarray]:
+    """
+    :param size: count of combinations after the pass
+    :returns: how many combinations of a single pass may contain every trait - one more than it lacks to its target
+    share of size, so an over-represented trait can appear in a single combination of the pass
+    """
+    return [
+        (np.ceil(np.maximum(shares * size - trait_counts, 0)) + 1).astype(np.int64)
+        for trait_counts, shares in zip(counts, target_shares)
+    ]
+
+
+def select_diverse_top_k(
+        score: np.ndarray, codes: np.ndarray, k: int, capacities: list[np.ndarray]
+) -> np.ndarray:
+    """
+    Selects up to k best scored combinations, skipping ones containing a trait that already reached its capacity
+    within the selection. Candidates are visited in descending order of score, equal scores in order of codes.
+    :returns: rows of the selected combinations, the best one first
+    """
+    capacities = [capacity.copy() for capacity in capacities]
+    # Only the best candidates are sorted, when they are not diverse enough, fewer combinations are selected
+    # instead of digging deeper into the worse ones
+    candidates_count = min(len(score), SELECTION_CANDIDATES_PER_PICK * k)
+    threshold = score[np.argpartition(-score, candidates_count - 1)[candidates_count - 1]]
+    top = np.flatnonzero((score >= threshold) & (score > -np.inf))
+    top = top[np.lexsort((top, -score[top]))]
+
+    # Candidates are checked in blocks, so the ones containing exhausted traits are skipped vectorized
+    selected = []
+    position = 0
+    while len(selected) < k and position < len(top):
+        block = top[position:position + SELECTION_BLOCK_SIZE]
+        allowed = np.ones(len(block), dtype=bool)
+        for column, capacity in enumerate(capacities):
+            allowed &= capacity[codes[block, column]] > 0
+
+        hits = np.flatnonzero(allowed)
+        if not len(hits):
+            position += len(block)
+            continue
+
+        row = block[hits[0]]
+        selected.append(row)
+        for column, capacity in enumerate(capacities):
+            capacity[codes[row, column]] -= 1
+        position += int(hits[0]) + 1
+
+    return np.array(selected, dtype=np.int64)
+
+
+def generate_with_code_matrix(state: GenerationState, count: int, picks_per_pass: int = 1) -> GenerationState:
+    """
+    Runs `iter_code_matrix` till the end.
+    :returns: state extended by count of sampled combinations
+    """
+    for _ in iter_code_matrix(state, count, picks_per_pass):
+        pass
+    return state
+
+
+def find_best_unused_combination(
+        weight_differences: list[np.ndarray], summation_order: np.ndarray, strides: list[int],
+        used: Union[UsedBitmap, set[int]]
+) -> tuple[tuple[int, ...], int]:
+    """
+    Enumerates combinations in descending order of cumulative weights difference (k-best search over traits sorted
+    per feature) until the first one that has not been used yet. Combinations scoring equally to it are enumerated
+    as well and the one with the lowest code is picked, hence the pick is the same as of the full scan.
+    :returns: trait indices and code of the best unused combination
+    """
+    orders = [np.lexsort((np.arange(len(differences)), -differences)).tolist() for differences in weight_differences]
+    sorted_differences = [differences[order].tolist() for differences, order in zip(weight_differences, orders)]
+    features_count = len(orders)
+
+    def score(positions: tuple[int, ...]) -> float:
+        # Rounding of every addition is monotonic, so a child never scores more than its parent
+        result = 0.0
+        for column in summation_order:
+            result += sorted_differences[column][positions[column]]
+        return result
+
+    # Lowest trait index at any position from the given one on, bounds codes reachable below a node
+    lowest_traits = [np.minimum.accumulate(order[::-1])[::-1].tolist() for order in orders]
+
+    def lowest_code(code: int, positions: tuple[int, ...], last_changed: int) -> int:
+        for column in range(last_changed, features_count):
+            position = positions[column]
+            code += (lowest_traits[column][position] - orders[column][position]) * strides[column]
+        return code
+
+    # Every node is reached only from the parent which incremented the position of the last changed feature
+    # or an earlier one, so no combination is pushed twice
+    start = (0,) * features_count
+    start_code = sum(order[0] * stride for order, stride in zip(orders, strides))
+    frontier = [(-score(start), start_code, start, 0)]
+    best = None
+    while frontier and (best is None or frontier[0][0] == best[0]):
+        negative_score, code, positions, last_changed = heappop(frontier)
+        if best is not None and lowest_code(code, positions, last_changed) >= best[1]:
+            continue
+        if code not in used and (best is None or code < best[1]):
+            best = (negative_score, code, positions)
+
+        for column in range(last_changed, features_count):
+            order, position = orders[column], positions[column]
+            if position + 1 < len(order):
+                child = positions[:column] + (position + 1,) + positions[column + 1:]
+                child_code = code + (order[position + 1] - order[position]) * strides[column]
+                heappush(frontier, (-score(child), child_code, child, column))
+
+    if best is None:
+        raise ValueError('All possible combinations have already been used!')
+
+    _, code, positions = best
+    return tuple(order[position] for order, position in zip(orders, positions)), code
+
+
+def iter_best_first_search(state: GenerationState, count: int) -> Iterator[tuple[int, ...]]:
+    """
+    Greedy generation equivalent to `iter_code_matrix`, but instead of scoring every combination,
+    each step searches for the best unused one. Step cost depends on count of features and traits,
+    not on the size of the combination space.
+    :returns: iterator adding count of sampled combinations to the state, yielding trait indices of every one
+    """
+    summation_order = np.argsort(np.array(state.space.features, dtype=str), kind='stable')
+
+    for _ in tqdm(range(count), desc='Generating combinations'):
+        indices, code = find_best_unused_combination(
+            state.weight_differences(), summation_order, state.space.strides, state.used
+        )
+        state.add(indices, code)
+        yield indices
+
+
+def generate_with_best_first_search(state: GenerationState, count: int) -> GenerationState:
+    """
+    Runs `iter_best_first_search` till the end.
+    :returns: state extended by count of sampled combinations
+    """
+    for _ in iter_best_first_search(state, count):
+        pass
+    return state
+
+
+def iter_candidate_pool(
+        state: GenerationState, count: int, pool_size: int, rng: np.random.Generator
+) -> Iterator[np.ndarray]:
+    """
+    Approximate greedy generation - instead of the whole space, every step scores only a pool of candidates drawn
+    from target weights (every trait independently, like `WeightedRandomCombinationGenerator`) and picks the best
+    one. Picked candidates are replaced by new draws, so step cost depends on pool size and count of features,
+    not on the size of the space.
+    :returns: iterator adding count of sampled combinations to the state, yielding trait indices of every one
+    """
+    space = state.space
+    alias_tables = [build_alias_table(weights) for weights in space.target_weights]
+    summation_order = np.argsort(np.array(space.features, dtype=str), kind='stable')
+    pool = np.empty((0, len(space.features)), dtype=space.index_dtype)
+    pool_codes = np.empty(0, dtype=np.int64 if space.fits_int64 else object)
+
+    for _ in tqdm(range(count), desc='Generating combinations'):
+        # Refilling stops once draws bring nothing new, which happens when the pool covers most of unused space
+        attempts = 0
+        while len(pool) < pool_size and attempts < POOL_REFILL_ATTEMPTS:
+            missing = pool_size - len(pool)
+            candidates, candidate_codes = draw_candidates(
+                state, alias_tables, max(2 * missing, POOL_MIN_DRAWS), pool_codes, rng
+            )
+            pool = np.concatenate([pool, candidates[:missing]])
+            pool_codes = np.concatenate([pool_codes, candidate_codes[:missing]])
+            if not len(candidates):
+                attempts = attempts + 1 if not len(pool) else POOL_REFILL_ATTEMPTS
+
+        if not len(pool):
+            raise ValueError(f'Could not draw an unused combination within {POOL_REFILL_ATTEMPTS} attempts!')
+
+        best = int(np.argmax(score_code_matrix(pool, state.weight_differences(), summation_order)))
+        indices = pool[best]
+        state.add(indices, int(pool_codes[best]))
+        pool, pool_codes = np.delete(pool, best, axis=0), np.delete(pool_codes, best)
+        yield indices
+
+
+def draw_candidates(
+        state: GenerationState, alias_tables: list[tuple[np.ndarray, np.ndarray]], size: int,
+        pool_codes: np.ndarray, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Draws candidates for the pool of `iter_candidate_pool`, dropping incompatible, used and duplicated ones.
+    :param pool_codes: codes of candidates already in the pool
+    :returns: trait indices and codes of the new candidates, in order of drawing
+    """
+    space = state.space
+    indices = np.column_stack([
+        draw_from_alias_table(probability, alias, size, rng) for probability, alias in alias_tables
+    ]).astype(space.index_dtype)
+    indices = indices[space.is_compatible(indices)]
+    codes = np.asarray(space.encode(indices)).reshape(-1)
+
+    _, first_occurrences = np.unique(codes, return_index=True)
+    first_occurrences = np.sort(first_occurrences)
+    indices, codes = indices[first_occurrences], codes[first_occurrences]
+
+    available = ~contains_many(state.used, codes) & ~np.isin(codes, pool_codes)
+    return indices[available], codes[available]
+
+
+def plan_shards(
+        space: CombinationSpace, count: int, excluded_indices: Optional[np.ndarray] = None
+) -> tuple[int, np.ndarray]:
+    """
+    Splits the space by traits of its highest-cardinality feature (pivot) and apportions count between the shards
+    proportionally to target weights of the pivot traits, never exceeding the size of a shard.
+    :param excluded_indices: (N x F) trait indices of excluded combinations, which reduce sizes of their shards
+    :returns: pivot feature column and count of combinations to generate per its trait
+    """
+    pivot = int(np.argmax(space.radices))
+    shard_size = np.array(
+        [shard_space(space, pivot, trait).compatible_size for trait in range(int(space.radices[pivot]))],
+        dtype=np.int64 if space.fits_int64 else object
     )
+    if excluded_indices is not None and len(excluded_indices):
+        shard_size -= np.bincount(excluded_indices[:, pivot].astype(np.int64), minlength=len(shard_size))
+    weights = space.target_weights[pivot].copy()
+    counts = np.zeros(len(weights), dtype=np.int64)
 
+    # Shards that would overflow are filled up and the rest is apportioned again between the remaining ones
+    while counts.sum() < count:
+        open_shards = counts < shard_size
+        shares = apportion(np.where(open_shards, weights, 0.0), count - counts.sum())
+        counts = np.minimum(counts + shares, shard_size)
+        weights = np.where(counts < shard_size, weights, 0.0)
+        if not weights.sum():
+            weights = (counts < shard_size).astype(np.float64)
 
-def combinations_by_range(
-        combinations: pd.DataFrame, start: float, end: float
-) -> pd.DataFrame:
+    return pivot, counts
+
+
+def shard_space(space: CombinationSpace, pivot: int, trait: int) -> CombinationSpace:
+    """
+    :returns: sub-space containing only combinations with given trait of the pivot feature
+    """
+    return CombinationSpace(
+        features=space.features,
+        traits=[traits[trait:trait + 1] if column == pivot else traits for column, traits in enumerate(space.traits)],
+        target_weights=[
+            weights[trait:trait + 1] if column == pivot else weights
+            for column, weights in enumerate(space.target_weights)
+        ],
+        masks={
+            (first, second): mask[trait:trait + 1] if first == pivot else mask[:, trait:trait + 1] if second == pivot
+            else mask
+            for (first, second), mask in space.masks.items()
+        }
+    )
+
+
+def generate_shard(
+        space: CombinationSpace, count: int, generate,
+        excluded_codes: Optional[np.ndarray] = None, false_positive_rate: Optional[float] = None
+) -> np.ndarray:
+    """
+    Runs greedy generation of a single shard, intended to be executed in a worker process.
+    :param excluded_codes: codes of excluded combinations within the shard space
+    :returns: (count x F) trait indices within the shard space
+    """
+    state = GenerationState(space=space, capacity=count)
+    if excluded_codes is not None and len(excluded_codes):
+        state.exclude(excluded_codes, false_positive_rate)
+
+    return generate(state=state, count=count).indices()
+
+
+def decode_codes(space: CombinationSpace, codes) -> np.ndarray:
+    """
+    Decodes codes one by one when the space does not fit in int64, vectorized otherwise.
+    :returns: (N x F) trait indices
+    """
+    if space.fits_int64:
+        return space.decode(np.asarray(codes, dtype=np.int64))
+
+    return np.array([space.decode(code) for code in codes], dtype=space.index_dtype).reshape(-1, len(space.features))
+
+
+def merge_shards(state: GenerationState, shards: list[np.ndarray]) -> GenerationState:
+    """
+    Rebalancing pass - interleaves shards into one sequence, keeping order within every shard. Each step picks
+    the shard head that fits the current distribution the best, so every prefix of the result stays balanced.
+    :returns: state extended by all combinations of the shards
+    """
+    summation_order = np.argsort(np.array(state.space.features, dtype=str), kind='stable')
+    shards = [shard for shard in shards if len(shard)]
+    heads = np.zeros(len(shards), dtype=np.int64)
+    lengths = np.array([len(shard) for shard in shards], dtype=np.int64)
+
+    for _ in tqdm(range(int(lengths.sum())), desc='Merging shards'):
+        candidates = np.stack([shard[min(head, length - 1)] for shard, head, length in zip(shards, heads, lengths)])
+        score = score_code_matrix(candidates, state.weight_differences(), summation_order)
+        score[heads >= lengths] = -np.inf
+
+        best_shard = int(np.argmax(score))
+        state.add(candidates[best_shard])
+        heads[best_shard] += 1
+
+    return state
+
+
+def generate_in_shards(
+        state: GenerationState, count: int, generate, processes: int,
+        excluded_codes: Optional[np.ndarray] = None, false_positive_rate: Optional[float] = None
+) -> GenerationState:
     """
-    Returns slice of generated combinations based on provided percentage (0.0 - 1.0)
+    Greedy generation split into shards by traits of the highest-cardinality feature, executed in a process pool.
+    :param excluded_codes: codes of combinations excluded from the space, split between the shards they belong to
+    :returns: state extended by count of sampled combinations
     """
-    return combinations.iloc[int(len(combinations) * start): int(len(combinations) * end), :]
+    space = state.space
+    excluded_indices = decode_codes(space, excluded_codes if excluded_codes is not None else [])
+    pivot, shard_counts = plan_shards(space, count, excluded_indices)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = []
+        for trait, shard_count in enumerate(shard_counts):
+            shard = shard_space(space, pivot, trait)
+            shard_excluded_indices = excluded_indices[excluded_indices[:, pivot] == trait]
+            shard_excluded_indices[:, pivot] = 0
+            futures.append(executor.submit(
+                generate_shard, shard, int(shard_count), generate,
+                np.asarray(shard.encode(shard_excluded_indices)), false_positive_rate
+            ))
+
+        shards = []
+        for trait, future in enumerate(futures):
+            shard = future.result()
+            shard[:, pivot] = trait
+            shards.append(shard)
+
+    state = merge_shards(state, shards)
+    logging.info(
+        f'Merged {len(shards)} shards, max distribution error: '
+        f'{max(np.abs(difference).max() for difference in state.weight_differences())}'
+    )
 
+    return state
 
-def weights_frame_by_range(
-        distribution_table: pd.DataFrame, combinations: pd.DataFrame, start: float, end: float
+
+def update_distribution_table(
+        distribution_table: pd.DataFrame, combinations: pd.DataFrame
 ) -> pd.DataFrame:
     """
-    Creates weights table for specified range of combinations table (0.0 - 1.0)
+    Updates weights frame
     """
     result = distribution_table.copy()
-    combinations_slice = combinations_by_range(combinations, start, end)
 
+    # Update traits current distribution
     for feature in combinations.columns:
-        distribution = combinations_slice[feature].value_counts(normalize=True)
-        for trait in combinations_slice[feature].unique():
+        distribution = combinations[feature].value_counts(normalize=True)
+        for trait in combinations[feature].unique():
             result.at[(feature, trait), 'current_weight'] = distribution[trait]
 
     # Update traits weights difference
-    result = (
+    return (
         result
         .assign(weight_difference=lambda d: d.target_weight - d.current_weight)
     )
-    return result
 
 
-def plot_distribution_error(
-        distribution_table: pd.DataFrame, combinations: pd.DataFrame,
-        n_point: int = 10, average: bool = False
-) -> None:
+def plot_distribution_error(distribution_error: pd.DataFrame, average: bool = False) -> None:
     """
-    Plots distribution error of rarity sampling.
-    Too big value of n_points will produce artifacts in plot.
+    Plots distribution error recorded during generation.
+    Requires seaborn and matplotlib, which are not installed by default - install the "plot" extra to use it.
     """
-    result = pd.DataFrame()
-
-    for i in range(n_point):
-        curr_range = (0, (i + 1) / n_point)
-        series = (
-            weights_frame_by_range(distribution_table, combinations, curr_range[0], curr_range[1])
-            .reset_index()
-            .assign(weight_difference=lambda d: abs(d['weight_difference']))
-            .groupby('feature_name')
-            .median()
-            ['weight_difference']
-            .rename(curr_range)
-        )
-        result = pd.concat([result, series], axis=1)
-
-    result = (
-        result
-        .T
-        .assign(index=np.linspace(0, len(combinations), n_point))
-    )
+    import seaborn as sns
+    from matplotlib import pyplot as plt
 
+    result = distribution_error
     if average:
-        result = (
-            result
-            .assign(AVERAGE=lambda d: d.median(axis=1))
-            [['index', 'AVERAGE']]
-        )
+        result = result.median(axis=1).rename('AVERAGE').to_frame()
 
     result = (
         result
-        .melt(id_vars='index')
+        .reset_index()
+        .melt(id_vars='combinations count')
         .set_axis(['combinations count', 'feature', 'distribution error [%]'], axis=1)
     )
 
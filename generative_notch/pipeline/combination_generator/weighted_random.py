@@ -0,0 +1,182 @@
+import os
+import logging
+from typing import Optional, Callable
+from attrs import define, field
+from tqdm import tqdm
+import numpy as np
+import pandas as pd
+from ..table_preprocessor.rescale_target_weights import normalize_weights_in_groups
+from .combination_generator import CombinationGenerator
+from .combination_space import CombinationSpace
+from .generation_state import GenerationState, resolve_checkpoint_filepath
+from .exclusion import load_excluded_codes
+
+
+@define
+class WeightedRandomCombinationGenerator(CombinationGenerator):
+    """
+    Draws combinations at random, every trait independently with probability proportional to its target weight.
+    Traits are drawn in O(1) from per-feature alias tables and duplicated combinations are rejected,
+    so the marginal distribution only statistically matches the target one, but the generation takes
+    a fraction of the time of the deterministic `TargetWeightBasedCombinationGenerator`.
+    When n is equal to -1, will generate all possible combinations.
+
+    :param seed: seed of the random generator, the same seed produces the same combinations
+    :param max_draws: average count of draws per combination after which the generation gives up
+    :param checkpoint_every: when positive, a checkpoint is saved to save filepath after drawing at least
+    that many combinations since the previous one
+    :param resume: continue from the checkpoint in save filepath, producing the same result as an uninterrupted run
+    :param excluded_collections: frames or CSV filepaths of previously generated collections, their combinations
+    are never drawn
+    :param exclusion_false_positive_rate: when given, excluded combinations are kept in a Bloom filter of that
+    false positive rate instead of an exact index
+    :param report: achieved vs target distribution of the last run
+    """
+
+    table_config: dict
+    seed: Optional[int] = None
+    max_draws: int = 100
+    checkpoint_every: int = 0
+    resume: bool = False
+    excluded_collections: list = field(factory=list)
+    exclusion_false_positive_rate: Optional[float] = None
+    report: pd.DataFrame = field(init=False, default=None)
+    _state: GenerationState = field(init=False, default=None, repr=False)
+    _rng: np.random.Generator = field(init=False, default=None, repr=False)
+
+    def run(self, rarity_table: pd.DataFrame) -> pd.DataFrame:
+        # Drawing probabilities are normalized anyway, normalized targets make the report comparable
+        space = CombinationSpace.from_rarity_table(
+            rarity_table=normalize_weights_in_groups(
+                df=rarity_table,
+                group_column_name=self.table_config['feature_column_name'],
+                weights_column_name=self.table_config['weights_column_name']
+            ),
+            feature_column_name=self.table_config['feature_column_name'],
+            trait_column_name=self.table_config['trait_column_name'],
+            weights_column_name=self.table_config['weights_column_name'],
+            rules=self.table_config.get('rules')
+        )
+        excluded_codes = load_excluded_codes(space, self.excluded_collections)
+        max_combinations = space.compatible_size - len(excluded_codes)
+
+        count = max_combinations if self.n == -1 else self.n
+        if count > max_combinations:
+            raise ValueError(f'Cannot generate {count} combinations, possible count is {max_combinations}')
+
+        self._rng = np.random.default_rng(self.seed)
+        self._state = GenerationState(space=space, capacity=count)
+        checkpoint_filepath = resolve_checkpoint_filepath(self.save_filepath)
+        if self.resume and os.path.exists(checkpoint_filepath):
+            self._state = GenerationState.load(checkpoint_filepath, space=space, capacity=count, rng=self._rng)
+            logging.info(f'Resuming generation from checkpoint containing {self._state.size} combinations')
+        if len(excluded_codes):
+            self._state.exclude(excluded_codes, self.exclusion_false_positive_rate)
+
+        last_checkpoint_size = self._state.size
+
+        def save_checkpoint():
+            nonlocal last_checkpoint_size
+            if self.checkpoint_every and self._state.size - last_checkpoint_size >= self.checkpoint_every:
+                self.save()
+                last_checkpoint_size = self._state.size
+
+        state = generate_with_alias_tables(
+            state=self._state,
+            count=count - self._state.size,
+            rng=self._rng,
+            max_draws=self.max_draws * count,
+            on_batch=save_checkpoint
+        )
+
+        self.report = state.distribution_table(
+            feature_column_name=self.table_config['feature_column_name'],
+            trait_column_name=self.table_config['trait_column_name']
+        )
+        logging.debug(f'Done, max distribution error: {self.report.weight_difference.abs().max()}')
+
+        return state.to_frame()
+
+    def save(self):
+        """
+        Saves checkpoint of the current generation run, including state of the random generator.
+        """
+        if self._state is not None:
+            self._state.save(resolve_checkpoint_filepath(self.save_filepath), rng=self._rng)
+
+
+def build_alias_table(weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Builds Walker alias table (Vose's method) allowing to draw an index with probability proportional to its weight
+    in constant time.
+    :returns: probability of keeping the drawn index and index of its alias
+    """
+    if (weights < 0).any() or not weights.sum() > 0:
+        raise ValueError(f'Weights need to be non-negative with a positive sum, got {weights}')
+
+    probability = np.asarray(weights, dtype=np.float64) * len(weights) / weights.sum()
+    alias = np.arange(len(weights), dtype=np.int64)
+    small = [i for i, p in enumerate(probability) if p < 1.0]
+    large = [i for i, p in enumerate(probability) if p >= 1.0]
+
+    while small and large:
+        less, more = small.pop(), large.pop()
+        alias[less] = more
+        probability[more] += probability[less] - 1.0
+        (small if probability[more] < 1.0 else large).append(more)
+
+    # Leftovers are caused only by floating point error, their probability is 1
+    probability[small + large] = 1.0
+
+    return probability, alias
+
+
+def draw_from_alias_table(
+        probability: np.ndarray, alias: np.ndarray, size: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    :returns: indices drawn from the given alias table
+    """
+    drawn = rng.integers(0, len(probability), size=size)
+    return np.where(rng.random(size) < probability[drawn], drawn, alias[drawn])
+
+
+def generate_with_alias_tables(
+        state: GenerationState, count: int, rng: np.random.Generator, max_draws: int,
+        on_batch: Optional[Callable[[], None]] = None
+) -> GenerationState:
+    """
+    Draws combinations in batches, every feature from its alias table, rejecting the already used ones.
+    :param on_batch: called after every batch of draws is processed, e.g. to save a checkpoint
+    :returns: state extended by count of drawn combinations
+    """
+    space = state.space
+    alias_tables = [build_alias_table(weights) for weights in space.target_weights]
+    target_size = state.size + count
+    draws = 0
+
+    with tqdm(total=count, desc='Generating combinations') as progress:
+        while state.size < target_size:
+            if draws >= max_draws:
+                raise RuntimeError(f'Could not draw {count} unique combinations within {max_draws} draws')
+
+            batch_size = max(1024, 2 * (target_size - state.size))
+            draws += batch_size
+            indices = np.column_stack([
+                draw_from_alias_table(probability, alias, batch_size, rng)
+                for probability, alias in alias_tables
+            ])
+
+            for combination, code in zip(indices, space.encode(indices).tolist()):
+                if code in state.used:
+                    continue
+
+                state.add(combination, code)
+                progress.update()
+                if state.size == target_size:
+                    break
+
+            if on_batch:
+                on_batch()
+
+    return state
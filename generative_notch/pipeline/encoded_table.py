@@ -0,0 +1,182 @@
+from typing import Union
+from attrs import define, field
+import numpy as np
+import pandas as pd
+
+# Type of target weights of the encoded table, precise enough for weights at half the memory of float64
+WEIGHT_DTYPE = np.float32
+
+
+@define
+class Vocabulary:
+    """
+    Names of features and of traits of every feature, in order of their appearance in the rarity table.
+    Codes are positions in the vocabulary, trait codes are local to their feature.
+
+    :param features: feature names
+    :param traits: trait names per feature, unique within the feature
+    """
+    features: list[str]
+    traits: list[np.ndarray] = field()
+    @traits.validator
+    def __traits_validator(self, _, val: list[np.ndarray]):
+        for feature, traits in zip(self.features, val):
+            if len(pd.unique(traits)) != len(traits):
+                raise ValueError(f'Traits of feature [{feature}] are not unique: {list(traits)}')
+
+    _feature_codes: dict[str, int] = field(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        self._feature_codes = {feature: code for code, feature in enumerate(self.features)}
+
+    @property
+    def radices(self) -> np.ndarray:
+        """Count of traits per feature."""
+        return np.array([len(traits) for traits in self.traits], dtype=np.int64)
+
+    @property
+    def code_dtype(self) -> np.dtype:
+        """Smallest integer type able to hold a trait code of any feature, -1 included."""
+        return np.result_type(np.int8, np.min_scalar_type(-int(self.radices.max(initial=1))))
+
+    def feature_code(self, feature: str) -> int:
+        if feature not in self._feature_codes:
+            raise KeyError(f'Feature [{feature}] is not present in the vocabulary!')
+        return self._feature_codes[feature]
+
+    def encode_traits(self, feature: str, traits) -> np.ndarray:
+        """
+        :returns: codes of the given traits of the feature, -1 for traits missing in the vocabulary
+        """
+        categories = self.traits[self.feature_code(feature)]
+        return pd.Categorical(traits, categories=categories).codes.astype(self.code_dtype)
+
+    def decode_traits(self, feature: str, codes) -> pd.Categorical:
+        """
+        :returns: traits of the feature with given codes, sharing the vocabulary instead of copying names
+        """
+        return pd.Categorical.from_codes(codes, categories=self.traits[self.feature_code(feature)])
+
+    def encode_combinations(self, combinations: pd.DataFrame) -> np.ndarray:
+        """
+        :param combinations: frame of trait names, one column per feature
+        :returns: (N x F) matrix of trait codes
+        """
+        result = np.column_stack([
+            self.encode_traits(feature, combinations[feature]) for feature in self.features
+        ]).reshape(-1, len(self.features))
+        if (result < 0).any():
+            raise ValueError('Combinations contain traits that are not present in the vocabulary!')
+
+        return result
+
+    def decode_combinations(self, codes: np.ndarray) -> pd.DataFrame:
+        """
+        :param codes: (N x F) matrix of trait codes
+        :returns: frame of categorical traits, one column per feature
+        """
+        codes = np.asarray(codes).reshape(-1, len(self.features))
+        return pd.DataFrame({
+            feature: self.decode_traits(feature, codes[:, column]) for column, feature in enumerate(self.features)
+        })
+
+
+@define
+class EncodedRarityTable:
+    """
+    Rarity table with features and traits held as integer codes of its vocabulary and target weights as float32.
+    Rows keep the order of the rarity table.
+
+    :param feature_codes: feature code of every row
+    :param trait_codes: trait code of every row, local to its feature
+    :param target_weights: target weight of every row
+    """
+    vocabulary: Vocabulary
+    feature_codes: np.ndarray
+    trait_codes: np.ndarray
+    target_weights: np.ndarray
+
+    @classmethod
+    def from_rarity_table(
+            cls, rarity_table: pd.DataFrame,
+            feature_column_name: str, trait_column_name: str, weights_column_name: str
+    ) -> 'EncodedRarityTable':
+        """
+        Encodes the rarity table in a single pass per feature. Every trait has to appear once within its feature.
+        Categorical columns (e.g. of a table returned by `to_frame`) are encoded from their codes, without hashing
+        trait names again.
+        """
+        feature_column, trait_column = rarity_table[feature_column_name], rarity_table[trait_column_name]
+        if is_categorical(feature_column) and is_categorical(trait_column):
+            feature_codes, feature_uniques = pd.factorize(feature_column.cat.codes.to_numpy())
+            features = feature_column.cat.categories.take(feature_uniques)
+            trait_values, trait_categories = trait_column.cat.codes.to_numpy(), trait_column.cat.categories
+            missing = (feature_column.cat.codes < 0) | (trait_column.cat.codes < 0)
+        else:
+            feature_codes, features = pd.factorize(feature_column)
+            trait_values, trait_categories = trait_column.to_numpy(), None
+            missing = feature_column.isna() | trait_column.isna()
+        if missing.any():
+            raise ValueError('Every row of the rarity table needs a feature and a trait!')
+
+        trait_codes = np.empty(len(rarity_table), dtype=np.int64)
+        traits = []
+        for feature_code, feature in enumerate(features):
+            rows = feature_codes == feature_code
+            trait_codes[rows], feature_traits = pd.factorize(trait_values[rows])
+            if len(feature_traits) != rows.sum():
+                raise ValueError(f'Traits of feature [{feature}] are not unique!')
+            if trait_categories is not None:
+                feature_traits = trait_categories.take(feature_traits)
+            traits.append(np.asarray(feature_traits, dtype=object))
+
+        vocabulary = Vocabulary(features=list(features), traits=traits)
+        return cls(
+            vocabulary=vocabulary,
+            feature_codes=feature_codes.astype(np.min_scalar_type(max(len(features) - 1, 0))),
+            trait_codes=trait_codes.astype(vocabulary.code_dtype),
+            target_weights=rarity_table[weights_column_name].to_numpy(dtype=WEIGHT_DTYPE)
+        )
+
+    def __len__(self) -> int:
+        return len(self.feature_codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory taken by codes and weights, the vocabulary excluded."""
+        return self.feature_codes.nbytes + self.trait_codes.nbytes + self.target_weights.nbytes
+
+    def feature_weights(self, feature: Union[str, int]) -> np.ndarray:
+        """
+        :param feature: name or code of the feature
+        :returns: target weights of traits of the feature, in order of their codes
+        """
+        feature_code = self.vocabulary.feature_code(feature) if isinstance(feature, str) else feature
+        rows = self.feature_codes == feature_code
+        result = np.zeros(len(self.vocabulary.traits[feature_code]), dtype=WEIGHT_DTYPE)
+        result[self.trait_codes[rows]] = self.target_weights[rows]
+        return result
+
+    def to_frame(
+            self, feature_column_name: str = 'feature_name', trait_column_name: str = 'trait_name',
+            weights_column_name: str = 'target_weight'
+    ) -> pd.DataFrame:
+        """
+        :returns: rarity table with categorical feature and trait columns, traits sharing names across features
+        """
+        offsets = np.concatenate([[0], np.cumsum(self.vocabulary.radices)[:-1]]).astype(np.int64)
+        all_traits = np.concatenate(self.vocabulary.traits) if self.vocabulary.traits else np.empty(0, dtype=object)
+        trait_categories = pd.unique(all_traits)
+        global_codes = pd.Categorical(all_traits, categories=trait_categories).codes
+
+        return pd.DataFrame({
+            feature_column_name: pd.Categorical.from_codes(self.feature_codes, categories=self.vocabulary.features),
+            trait_column_name: pd.Categorical.from_codes(
+                global_codes[offsets[self.feature_codes] + self.trait_codes], categories=trait_categories
+            ),
+            weights_column_name: self.target_weights
+        })
+
+
+def is_categorical(column: pd.Series) -> bool:
+    return isinstance(column.dtype, pd.CategoricalDtype)
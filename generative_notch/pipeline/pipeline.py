@@ -1,11 +1,13 @@
-from typing import Type
+from typing import Type, Iterator, Optional
 import logging
 import pandas as pd
 from collections import defaultdict
+from itertools import repeat
 from attrs import define, field
-from .table_loader.table_loader import TableLoader
-from .table_preprocessor.table_preprocessor import TablePreprocessor
-from .combination_generator.combination_generator import CombinationGenerator
+from .table_loader.table_loader import TableLoader, StreamingTableLoader
+from .table_preprocessor.table_preprocessor import TablePreprocessor, apply_preprocessors
+from .encoded_table import EncodedRarityTable
+from .combination_generator.combination_generator import CombinationGenerator, split_into_batches
 from .trait_interpreter.trait_interpreter import TraitInterpreter
 from .trait_assembler.trait_assembler import TraitAssembler, AssemblyInstructions
 from .renderer.renderer import Renderer, RenderInstructions
@@ -27,6 +29,22 @@ class TableLoaderPipelineModule:
         except AttributeError:
             raise NotRegistered(f'TableLoader has not beet set!')
 
+    def iter(self) -> Iterator[pd.DataFrame]:
+        """
+        Yields the table in chunks when the loader streams it, otherwise the whole table at once.
+        """
+        if not hasattr(self, 'loader'):
+            raise NotRegistered(f'TableLoader has not beet set!')
+
+        if isinstance(self.loader, StreamingTableLoader):
+            yield from self.loader.iter_chunks()
+        else:
+            yield self.loader.run()
+
+    @property
+    def is_streaming(self) -> bool:
+        return isinstance(getattr(self, 'loader', None), StreamingTableLoader)
+
     def set(self, loader: TableLoader) -> 'Pipeline':
         logging.debug(f'Setting TableLoader: {loader}')
         self.loader = loader
@@ -37,15 +55,31 @@ class TableLoaderPipelineModule:
 class TablePreprocessorPipelineModule:
     pipeline: 'Pipeline'
     preprocessors: list[TablePreprocessor] = field(init=False, factory=list)
-
-    def run(self, table: pd.DataFrame) -> pd.DataFrame:
-        result = table.copy()
-
-        for preprocessor in self.preprocessors:
-            result = preprocessor.run(result)
+    table_config: Optional[dict] = field(init=False, default=None)
+    encoded: Optional[EncodedRarityTable] = field(init=False, default=None)
+
+    def run(self, table: pd.DataFrame, encode: bool = True) -> pd.DataFrame:
+        """
+        :param encode: when encoding is enabled, the preprocessed table is encoded into `encoded`
+        and passed on with categorical feature and trait columns and float32 target weights
+        """
+        result = apply_preprocessors(table, self.preprocessors)
+
+        if encode and self.table_config is not None:
+            column_names = {
+                key: self.table_config[key]
+                for key in ('feature_column_name', 'trait_column_name', 'weights_column_name')
+            }
+            self.encoded = EncodedRarityTable.from_rarity_table(result, **column_names)
+            result = self.encoded.to_frame(**column_names)
 
         return result
 
+    def encode(self, table_config: dict) -> 'Pipeline':
+        logging.debug(f'Enabling rarity table encoding: {table_config}')
+        self.table_config = table_config
+        return self.pipeline
+
     def register(self, preprocessor: TablePreprocessor) -> 'Pipeline':
         logging.debug(f'Registering TablePreprocessor: {preprocessor}')
         self.preprocessors.append(preprocessor)
@@ -65,6 +99,18 @@ class CombinationGeneratorPipelineModule:
         result = self.generator.run(table)
         return result
 
+    def iter(self, table: pd.DataFrame, batch_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yields combinations in batches as soon as the generator picks them, so the following stages can start
+        before the generation ends. Without batch size, combinations are passed in a single batch.
+        """
+        if not hasattr(self, 'generator'):
+            logging.warning('CombinationGenerator has not been set! Assuming that the table contains combinations.')
+            yield table
+            return
+
+        yield from self.generator.iter_combinations(table, batch_size=batch_size)
+
     def set(self, generator: CombinationGenerator) -> 'Pipeline':
         logging.debug(f'Setting CombinationGenerator: {generator}')
         self.generator = generator
@@ -75,19 +121,53 @@ class CombinationGeneratorPipelineModule:
 class TraitInterpreterPipelineModule:
     pipeline: 'Pipeline'
     interpreters: list[TraitInterpreter] = field(init=False, factory=list)
+    _plans: dict[tuple, dict[str, tuple[TraitInterpreter, ...]]] = field(init=False, factory=dict, repr=False)
 
     def run(self, combinations: pd.DataFrame) -> dict[int, AssemblyInstructions]:
+        """
+        Columnar interpreters interpret whole columns of the combinations at once, the others are given
+        traits row by row.
+        """
         result: dict[int, AssemblyInstructions] = {}
-
-        for idx, combination in combinations.iterrows():
+        plan = self.compile(combinations.columns)
+        features = list(plan)
+
+        # Instructions of every column handled by a columnar interpreter, by position of the interpreter
+        column_instructions: dict[int, list[list[Optional[dict]]]] = {
+            position: [
+                interpreter.interpret_column(feature, combinations.iloc[:, column])
+                for column, feature in enumerate(features)
+                if any(handler is interpreter for handler in plan[feature])
+            ]
+            for position, interpreter in enumerate(self.interpreters)
+            if interpreter.columnar
+        }
+        # Row by row interpreters of every column, by position of the column
+        row_plan: dict[int, list[TraitInterpreter]] = {
+            column: row_interpreters
+            for column, feature in enumerate(features)
+            if (row_interpreters := [interpreter for interpreter in plan[feature] if not interpreter.columnar])
+        }
+
+        rows = combinations.itertuples(index=False, name=None) if row_plan else repeat(())
+        for row, (idx, combination) in enumerate(zip(combinations.index, rows)):
             combination_id = int(str(idx))
             result[combination_id] = {}
 
-            for interpreter in self.interpreters:
-                for feature, trait in combination.items():
-                    interpreter.run(str(feature), trait)
-
-                assembler_type, instructions = interpreter.get_result()
+            for column, interpreters in row_plan.items():
+                for interpreter in interpreters:
+                    interpreter.dispatch(features[column], combination[column])
+
+            for position, interpreter in enumerate(self.interpreters):
+                if position in column_instructions:
+                    assembler_type = interpreter.compatible_assembler
+                    instructions = [
+                        instruction
+                        for column in column_instructions[position]
+                        if (instruction := column[row]) is not None
+                    ]
+                else:
+                    assembler_type, instructions = interpreter.get_result()
 
                 if assembler_type not in result[combination_id]:
                     result[combination_id][assembler_type]: list[dict] = []
@@ -97,9 +177,42 @@ class TraitInterpreterPipelineModule:
 
         return result
 
+    def compile(self, features) -> dict[str, tuple[TraitInterpreter, ...]]:
+        """
+        Builds a dispatch plan once per set of features, mapping every feature to interpreters implementing
+        its action (usually a single one), so that every trait is passed only to interpreters handling it.
+        Features whose action is not implemented by any registered interpreter are skipped with a single warning.
+
+        :raises ValueError: if a feature does not exist in config of any interpreter
+        :returns: interpreters by feature name
+        """
+        key = tuple(str(feature) for feature in features)
+        if key in self._plans:
+            return self._plans[key]
+
+        if not self.interpreters:
+            raise NotRegistered(f'No TraitInterpreter has been registered!')
+
+        plan: dict[str, tuple[TraitInterpreter, ...]] = {}
+        for feature in key:
+            configured = [interpreter for interpreter in self.interpreters if feature in interpreter.config]
+            if not configured:
+                raise ValueError(f'Given feature [{feature}] does not exist in config of any TraitInterpreter!')
+
+            plan[feature] = tuple(interpreter for interpreter in configured if interpreter.handles(feature))
+            if not plan[feature]:
+                logging.warning(
+                    f"No registered TraitInterpreter implements action [{configured[0].config[feature]['action']}] "
+                    f'of feature [{feature}], skipping it'
+                )
+
+        self._plans[key] = plan
+        return plan
+
     def register(self, interpreter: TraitInterpreter) -> 'Pipeline':
         logging.debug(f'Registering TraitInterpreter: {interpreter}')
         self.interpreters.append(interpreter)
+        self._plans.clear()
         return self.pipeline
 
 
@@ -185,16 +298,34 @@ class Pipeline:
         self.outputPostprocessor = None
         self.finalizer = None
 
-    def run(self):
-        table = self.tableLoader.run()
-        preprocessed_table = self.tablePreprocessor.run(table)
-        combinations = self.combinationGenerator.run(preprocessed_table)
-        assembly_instructions = self.traitInterpreter.run(combinations)
-        render_instructions = self.traitAssembler.run(assembly_instructions)
-        output_footage = self.renderer.run(render_instructions)
+    def run(self, batch_size: Optional[int] = None):
+        """
+        :param batch_size: when given, combinations are interpreted, assembled and rendered in batches of this size,
+        interleaved with the generation of the following ones
+        """
+        output_footage: list[str] = []
+        for combinations in self.__iter_combinations(batch_size):
+            assembly_instructions = self.traitInterpreter.run(combinations)
+            render_instructions = self.traitAssembler.run(assembly_instructions)
+            output_footage.extend(self.renderer.run(render_instructions))
 
         return output_footage
         # postprocessed_footage: list[str] = self.outputPostprocessor.run(output_footage)
         # feedback: str = self.finalizer.run(postprocessed_footage)
 
         # return feedback
+
+    def __iter_combinations(self, batch_size: Optional[int]) -> Iterator[pd.DataFrame]:
+        """
+        Without generator, a streamed table is taken as ready-made combinations and passed on chunk by chunk,
+        so it never has to fit in memory.
+        """
+        if self.tableLoader.is_streaming and not hasattr(self.combinationGenerator, 'generator'):
+            logging.info('CombinationGenerator has not been set, streaming combinations from the table.')
+            for chunk in self.tableLoader.iter():
+                yield from split_into_batches(self.tablePreprocessor.run(chunk, encode=False), batch_size)
+            return
+
+        table = self.tableLoader.run()
+        preprocessed_table = self.tablePreprocessor.run(table)
+        yield from self.combinationGenerator.iter(preprocessed_table, batch_size=batch_size)
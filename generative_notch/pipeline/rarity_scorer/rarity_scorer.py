@@ -0,0 +1,130 @@
+import logging
+import os
+from typing import Optional
+from attrs import define, field
+import numpy as np
+import pandas as pd
+from ..combination_generator.combination_space import CombinationSpace
+from ..table_loader.columnar import write_columnar_table
+
+
+@define
+class RarityScorer:
+    """
+    Scores rarity of every token of a generated collection in a single vectorized pass over its trait index matrix.
+    Trait frequencies are measured in the collection itself, per token it computes:
+    - rarity score: sum of inverse frequencies of its traits,
+    - statistical rarity: product of frequencies of its traits (probability of drawing such token),
+    - harmonic rarity: harmonic mean of frequencies of its traits,
+    and ranks tokens by each of them, rank 1 being the rarest one and equally rare tokens sharing the rank.
+
+    :param save_filepath: file (.parquet, .feather, .arrow or .csv) to write scores to, trait frequencies are
+    written next to it with `.trait_frequencies` suffix. Columnar formats require pyarrow ("arrow" extra).
+    """
+    table_config: dict
+    save_filepath: Optional[str] = None
+    trait_frequencies: pd.DataFrame = field(init=False, default=None)
+
+    def run(self, combinations: pd.DataFrame, rarity_table: pd.DataFrame) -> pd.DataFrame:
+        """
+        :param combinations: generated collection, one column per feature
+        :param rarity_table: rarity table the collection was generated from
+        :returns: combinations with rarity scores and ranks appended, indexed by IDs of the tokens
+        """
+        space = CombinationSpace.from_rarity_table(
+            rarity_table=rarity_table,
+            feature_column_name=self.table_config['feature_column_name'],
+            trait_column_name=self.table_config['trait_column_name'],
+            weights_column_name=self.table_config['weights_column_name']
+        )
+        indices = space.indices_from_frame(combinations)
+        counts = trait_counts(space, indices)
+        scores = score_indices(indices, counts).set_axis(combinations.index)
+
+        self.trait_frequencies = trait_frequencies_frame(space, counts)
+        result = pd.concat([combinations, scores], axis=1)
+
+        if self.save_filepath:
+            logging.info(f'Saving rarity scores of {len(result)} tokens to {self.save_filepath}')
+            save_columnar(result, self.save_filepath)
+            stem, extension = os.path.splitext(self.save_filepath)
+            save_columnar(self.trait_frequencies, f'{stem}.trait_frequencies{extension}', index=False)
+
+        return result
+
+
+def trait_counts(space: CombinationSpace, indices: np.ndarray) -> list[np.ndarray]:
+    """
+    :param indices: (N x F) matrix of trait indices
+    :returns: occurrences of every trait per feature
+    """
+    return [
+        np.bincount(indices[:, column], minlength=radix)
+        for column, radix in enumerate(space.radices)
+    ]
+
+
+def score_indices(indices: np.ndarray, counts: list[np.ndarray]) -> pd.DataFrame:
+    """
+    Computes rarity scores and ranks of tokens, gathering frequencies of their traits column by column.
+    Statistical rarity is accumulated as sum of logarithms, so it does not underflow for many features.
+    :param indices: (N x F) matrix of trait indices
+    :param counts: occurrences of every trait per feature, see `trait_counts`
+    :returns: frame of scores and ranks, one row per token
+    """
+    token_count, feature_count = indices.shape
+    inverse_sum = np.zeros(token_count, dtype=np.float64)
+    log_probability = np.zeros(token_count, dtype=np.float64)
+    for column, feature_counts in enumerate(counts):
+        frequencies = np.maximum(feature_counts, 1) / max(token_count, 1)
+        inverse_sum += (1 / frequencies)[indices[:, column]]
+        log_probability += np.log(frequencies)[indices[:, column]]
+
+    # Harmonic mean of frequencies decreases monotonically with the rarity score, so both share ranks
+    score_ranks = rank_descending(inverse_sum)
+    return pd.DataFrame({
+        'rarity_score': inverse_sum,
+        'rarity_score_rank': score_ranks,
+        'statistical_rarity': np.exp(log_probability),
+        'statistical_rarity_rank': rank_descending(-log_probability),
+        'harmonic_rarity': feature_count / np.where(inverse_sum > 0, inverse_sum, np.inf),
+        'harmonic_rarity_rank': score_ranks
+    })
+
+
+def rank_descending(values: np.ndarray) -> np.ndarray:
+    """
+    Ranks values from the highest one, equal values share the lowest rank of their group (1, 2, 2, 4, ...).
+    """
+    order = np.argsort(-values, kind='stable')
+    ordered = values[order]
+    is_new_group = np.r_[True, ordered[1:] != ordered[:-1]]
+    group_ranks = np.flatnonzero(is_new_group) + 1
+
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = group_ranks[np.cumsum(is_new_group) - 1]
+    return ranks
+
+
+def trait_frequencies_frame(space: CombinationSpace, counts: list[np.ndarray]) -> pd.DataFrame:
+    """
+    :returns: frame of trait occurrences and frequencies in the collection, next to their target weights
+    """
+    return pd.DataFrame({
+        'feature': np.repeat(space.features, space.radices),
+        'trait': np.concatenate(space.traits),
+        'count': np.concatenate(counts),
+        'frequency': np.concatenate([feature_counts / max(feature_counts.sum(), 1) for feature_counts in counts]),
+        'target_weight': np.concatenate(space.target_weights)
+    })
+
+
+def save_columnar(frame: pd.DataFrame, filepath: str, index: bool = True) -> None:
+    """
+    Writes frame as CSV or in a columnar format, see `write_columnar_table`, chosen by file extension.
+    :param index: whether CSV starts with the index column (token IDs), columnar formats always store the index
+    """
+    if os.path.splitext(filepath)[1].lower() == '.csv':
+        frame.to_csv(filepath, index=index)
+    else:
+        write_columnar_table(frame, filepath)
@@ -0,0 +1,84 @@
+import os
+from attrs import define, field
+import pandas as pd
+from .table_loader import TableLoader
+
+# Extensions of supported columnar formats, Feather (version 2) being the Arrow IPC file format
+PARQUET_EXTENSIONS = ['.parquet']
+ARROW_IPC_EXTENSIONS = ['.feather', '.arrow', '.ipc']
+
+
+@define
+class ColumnarTableLoader(TableLoader):
+    """
+    Loads data from Parquet, Feather or Arrow IPC file, chosen by file extension. Categorical columns are preserved,
+    so traits are held as integer codes instead of strings. Requires pyarrow ("arrow" extra).
+
+    :param memory_map: map the file into memory instead of reading it into a buffer first; columns are still
+    copied when converted to pandas
+    """
+    filepath: str = field()
+    @filepath.validator
+    def __filepath_validator(self, attr, val):
+        if not os.path.exists(val):
+            raise FileNotFoundError(f'Columnar filepath {val} is not valid!')
+        resolve_columnar_format(val)
+
+    memory_map: bool = True
+
+    def run(self) -> pd.DataFrame:
+        if resolve_columnar_format(self.filepath) == 'parquet':
+            import_pyarrow()
+            return pd.read_parquet(self.filepath, engine='pyarrow', memory_map=self.memory_map)
+
+        pa = import_pyarrow()
+        # Columns may keep referencing the mapped file, so it is released together with them, not closed here
+        source = pa.memory_map(self.filepath) if self.memory_map else pa.OSFile(self.filepath)
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def write_columnar_table(table: pd.DataFrame, filepath: str) -> None:
+    """
+    Writes table to Parquet, Feather or Arrow IPC file, chosen by file extension. Text columns are stored
+    as categoricals (dictionary encoded), Feather / Arrow IPC files are left uncompressed, so they can be memory mapped.
+    The index (e.g. IDs of combinations) is stored as well and restored by `ColumnarTableLoader`.
+    """
+    columnar_format = resolve_columnar_format(filepath)
+    pa = import_pyarrow()
+
+    table = table.astype({column: 'category' for column in table.select_dtypes(include='object').columns})
+    if columnar_format == 'parquet':
+        table.to_parquet(filepath, engine='pyarrow', index=True)
+    else:
+        from pyarrow import feather
+        feather.write_feather(
+            pa.Table.from_pandas(table, preserve_index=True), filepath, compression='uncompressed'
+        )
+
+
+def resolve_columnar_format(filepath: str) -> str:
+    """
+    :returns: "parquet" or "ipc"
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        return 'parquet'
+    if extension in ARROW_IPC_EXTENSIONS:
+        return 'ipc'
+
+    raise ValueError(
+        f'Unsupported columnar format "{extension}", use one of {PARQUET_EXTENSIONS + ARROW_IPC_EXTENSIONS}'
+    )
+
+
+def import_pyarrow():
+    """
+    :raises ImportError: if pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError as error:
+        raise ImportError('Columnar formats require pyarrow, install the "arrow" extra') from error
+
+    return pyarrow
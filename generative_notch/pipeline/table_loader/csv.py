@@ -1,7 +1,8 @@
+from typing import Iterator, Optional
 from attrs import define, field
 import os
 import pandas as pd
-from .table_loader import TableLoader
+from .table_loader import TableLoader, StreamingTableLoader
 
 
 @define
@@ -18,3 +19,39 @@ class CSVTableLoader(TableLoader):
     def run(self) -> pd.DataFrame:
         result = pd.read_csv(self.filepath)
         return result
+
+
+@define
+class ChunkedCSVTableLoader(StreamingTableLoader):
+    """
+    Streams data from CSV file in chunks of fixed size, holding only a single chunk in memory at once.
+    Rows are indexed by their position in the file (or by the ID column), so IDs of combinations are stable
+    regardless of the chunk size.
+
+    :param id_column: column holding integer IDs of rows, used as the index instead of their positions
+    """
+    filepath: str = field()
+    @filepath.validator
+    def __filepath_validator(self, attr, val):
+        if not os.path.exists(val):
+            raise FileNotFoundError(f'CSV filepath {val} is not valid!')
+
+    chunk_size: int = field(default=100_000)
+    @chunk_size.validator
+    def __chunk_size_validator(self, attr, val):
+        if val < 1:
+            raise ValueError(f'Chunk size has to be positive, got {val}')
+
+    id_column: Optional[str] = None
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        start = 0
+        with pd.read_csv(self.filepath, chunksize=self.chunk_size) as reader:
+            for chunk in reader:
+                if self.id_column is not None:
+                    chunk = chunk.set_index(self.id_column).rename_axis(None)
+                    chunk.index = chunk.index.astype('int64')
+                else:
+                    chunk = chunk.set_axis(pd.RangeIndex(start, start + len(chunk)))
+                start += len(chunk)
+                yield chunk
@@ -1,37 +1,154 @@
+import os
+import re
+import json
 import logging
+from typing import Callable, Optional
 import gspread
 import pandas as pd
-from attrs import define
+from attrs import define, field
+from google.auth.exceptions import GoogleAuthError
 from gspread_dataframe import get_as_dataframe
-from .table_loader import TableLoader
+from .table_loader import TableLoader, clean_table
+
+# Errors meaning that Google Sheets cannot be reached, the cached table is used instead when there is one
+CONNECTION_ERRORS = (OSError, GoogleAuthError, gspread.exceptions.GSpreadException)
+# Characters of sheet and worksheet names replaced in filenames of the cache
+UNSAFE_FILENAME_CHARACTERS = r'[^\w.-]+'
 
 
 @define
 class GoogleSheetsTableLoader(TableLoader):
     """
     Google Sheet data loader
+
+    When `cache_dir` is given in the config, the loaded table is cached there together with the revision
+    (modification time) of the sheet. The next run only checks the revision and downloads the worksheet again
+    only if the sheet has changed since. When Google Sheets cannot be reached, the cached table is used.
+
+    :param client_factory: authorizes the client from credentials filename, called once per loader
+    :param fill_merged_cells: fill blank cells from above, disable for multiindex layouts (see `LayoutTableLoader`)
     """
 
     google_sheets_config: dict
+    client_factory: Callable[..., gspread.Client] = field(default=gspread.service_account, repr=False)
+    fill_merged_cells: bool = True
+    _client: Optional[gspread.Client] = field(init=False, default=None, repr=False)
 
     def run(self) -> pd.DataFrame:
+        cache_dir = self.google_sheets_config.get('cache_dir')
+        if not cache_dir:
+            return self.__download()
+
+        name = f"{self.google_sheets_config['sheet']}-{self.google_sheets_config['worksheet']}"
+        # Tables loaded without filling merged cells differ, so they are cached separately
+        cache = TableCache(directory=cache_dir, name=name if self.fill_merged_cells else f'{name}-unfilled')
+        try:
+            revision = get_sheet_revision(self.__get_client(), self.google_sheets_config['sheet'])
+            if revision == cache.revision():
+                logging.info(f'Google Sheets data has not changed since revision {revision}, loading it from cache')
+                return cache.read()
+
+            result = self.__download()
+        except (gspread.exceptions.SpreadsheetNotFound, gspread.exceptions.WorksheetNotFound):
+            raise
+        except CONNECTION_ERRORS as error:
+            if cache.revision() is None:
+                raise
+            logging.warning(
+                f'Could not reach Google Sheets ({error!r}), loading cached data of revision {cache.revision()}'
+            )
+            return cache.read()
+
+        cache.write(result, revision)
+        return result
+
+    def __download(self) -> pd.DataFrame:
         logging.info(f'Loading Google Sheets data...')
 
         df = load_table_from_google_sheets(
             credentials_filename=self.google_sheets_config['credentials'],
             sheet_filename=self.google_sheets_config['sheet'],
-            worksheet_name=self.google_sheets_config['worksheet']
+            worksheet_name=self.google_sheets_config['worksheet'],
+            client=self.__get_client()
         )
 
-        return (
-            df
-            .dropna(axis=0, how='all').dropna(axis=1, how='all')
-            .ffill()
-        )
+        return clean_table(df, fill_merged_cells=self.fill_merged_cells)
+
+    def __get_client(self) -> gspread.Client:
+        if self._client is None:
+            self._client = self.client_factory(filename=self.google_sheets_config['credentials'])
+        return self._client
+
+
+@define
+class TableCache:
+    """
+    Local copy of a loaded table, stored in Parquet when pyarrow is installed (the "arrow" extra), pickled otherwise,
+    next to a JSON file with revision of the source it was loaded from.
+    """
+    directory: str
+    name: str
 
+    @property
+    def metadata_filepath(self) -> str:
+        return os.path.join(self.directory, f'{re.sub(UNSAFE_FILENAME_CHARACTERS, "_", self.name)}.json')
 
-def load_table_from_google_sheets(credentials_filename: str, sheet_filename: str, worksheet_name: str) -> pd.DataFrame:
-    gc = gspread.service_account(filename=credentials_filename)
+    def revision(self) -> Optional[str]:
+        """
+        :returns: revision of the cached table, None when nothing is cached
+        """
+        metadata = self.__read_metadata()
+        if metadata is None or not os.path.exists(os.path.join(self.directory, metadata['filename'])):
+            return None
+        return metadata['revision']
+
+    def read(self) -> pd.DataFrame:
+        filepath = os.path.join(self.directory, self.__read_metadata()['filename'])
+        if filepath.endswith('.parquet'):
+            return pd.read_parquet(filepath)
+        return pd.read_pickle(filepath)
+
+    def write(self, table: pd.DataFrame, revision: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.splitext(self.metadata_filepath)[0]
+        try:
+            filepath = f'{stem}.parquet'
+            table.to_parquet(filepath, index=False)
+        except (ImportError, TypeError, ValueError) as error:
+            # Missing pyarrow, or a column mixing types which Parquet cannot store
+            logging.debug(f'Could not cache table as Parquet ({error!r}), pickling it instead')
+            filepath = f'{stem}.pkl'
+            table.to_pickle(filepath)
+
+        with open(self.metadata_filepath, 'w') as file:
+            json.dump({'revision': revision, 'filename': os.path.basename(filepath)}, file, indent=2)
+
+    def __read_metadata(self) -> Optional[dict]:
+        if not os.path.exists(self.metadata_filepath):
+            return None
+        with open(self.metadata_filepath) as file:
+            return json.load(file)
+
+
+def get_sheet_revision(client: gspread.Client, sheet_filename: str) -> str:
+    """
+    Asks Google Drive for modification time of the sheet, without opening it or downloading any of its worksheets.
+    :returns: modification time of the sheet
+    """
+    for spreadsheet_file in client.list_spreadsheet_files(sheet_filename):
+        if spreadsheet_file['name'] == sheet_filename:
+            return spreadsheet_file['modifiedTime']
+
+    raise gspread.exceptions.SpreadsheetNotFound(f'Spreadsheet {sheet_filename} was not found')
+
+
+def load_table_from_google_sheets(
+        credentials_filename: str, sheet_filename: str, worksheet_name: str, client: Optional[gspread.Client] = None
+) -> pd.DataFrame:
+    """
+    :param client: authorized client, a new one is authorized with the credentials when not given
+    """
+    gc = client or gspread.service_account(filename=credentials_filename)
     sh = gc.open(sheet_filename)
     worksheet = sh.worksheet(worksheet_name)
 
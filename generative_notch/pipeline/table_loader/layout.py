@@ -0,0 +1,106 @@
+from attrs import define, field
+import numpy as np
+import pandas as pd
+from .table_loader import TableLoader
+
+# Layouts of rarity table sheets, set by `layout` of the table config
+LAYOUTS = ['single', 'multiindex_horizontal', 'multiindex_vertical']
+# Prefix given by pandas to names of blank header cells
+BLANK_HEADER_PREFIX = 'Unnamed:'
+
+
+@define
+class LayoutTableLoader(TableLoader):
+    """
+    Loads data with the wrapped loader and converts it from the layout of the sheet to the single (long) layout,
+    with one row of feature, trait and target weight per trait:
+
+    - single: already in the long layout, passed on unchanged
+    - multiindex_horizontal: features side by side, every feature spanning two columns; the first row holds
+      feature names (merged across both columns), the second row trait and weights column names, traits follow
+      down the columns
+    - multiindex_vertical: the same transposed, every feature spanning two rows; the first column holds
+      feature names (merged across both rows), the second column trait and weights column names, traits follow
+      along the rows
+
+    Blank cells padding features with fewer traits are skipped, so the wrapped loader must not fill them
+    (e.g. `GoogleSheetsTableLoader(fill_merged_cells=False)`).
+
+    :param table_config: table config with `layout` and column names
+    """
+    loader: TableLoader
+    table_config: dict = field()
+    @table_config.validator
+    def __table_config_validator(self, _, val: dict):
+        if val.get('layout', 'single') not in LAYOUTS:
+            raise ValueError(f'Unknown table layout "{val["layout"]}", use one of {LAYOUTS}')
+
+    def run(self) -> pd.DataFrame:
+        return parse_table_layout(self.loader.run(), self.table_config)
+
+
+def parse_table_layout(df: pd.DataFrame, table_config: dict) -> pd.DataFrame:
+    """
+    Converts table loaded (with its first row as header) from the layout given in the table config
+    to the single layout. Reshaping is vectorized, rows are never iterated over.
+    """
+    layout = table_config.get('layout', 'single')
+    if layout == 'single':
+        return df
+    if layout not in LAYOUTS:
+        raise ValueError(f'Unknown table layout "{layout}", use one of {LAYOUTS}')
+
+    grid = to_grid(df)
+    return parse_horizontal_grid(
+        grid=grid if layout == 'multiindex_horizontal' else grid.T,
+        feature_column_name=table_config['feature_column_name'],
+        trait_column_name=table_config['trait_column_name'],
+        weights_column_name=table_config['weights_column_name']
+    )
+
+
+def to_grid(df: pd.DataFrame) -> np.ndarray:
+    """
+    :returns: cells of the sheet, header included as the first row, blank cells as NaN
+    """
+    header = [
+        np.nan if str(column).startswith(BLANK_HEADER_PREFIX) else column
+        for column in df.columns
+    ]
+    return np.vstack([np.array(header, dtype=object), df.to_numpy(dtype=object)])
+
+
+def parse_horizontal_grid(
+        grid: np.ndarray, feature_column_name: str, trait_column_name: str, weights_column_name: str
+) -> pd.DataFrame:
+    """
+    :param grid: cells of the sheet in the horizontal layout, feature names in the first row,
+    trait and weights column names in the second
+    :returns: table in the single layout, features in order of the sheet
+    """
+    if grid.shape[0] < 2:
+        raise ValueError('Table in a multiindex layout needs a row of features and a row of column names!')
+
+    features = pd.Series(grid[0]).ffill().to_numpy()
+    labels = grid[1]
+    values = grid[2:]
+
+    trait_columns = np.flatnonzero(labels == trait_column_name)
+    weight_columns = np.flatnonzero(labels == weights_column_name)
+    if len(trait_columns) == 0 or len(trait_columns) != len(weight_columns) \
+            or (features[trait_columns] != features[weight_columns]).any():
+        raise ValueError(
+            f'Every feature needs a single "{trait_column_name}" and "{weights_column_name}" column, '
+            f'found features {list(features[trait_columns])} and {list(features[weight_columns])} respectively!'
+        )
+    if pd.isna(features[trait_columns]).any() or len(pd.unique(features[trait_columns])) != len(trait_columns):
+        raise ValueError(f'Features {list(features[trait_columns])} are not named or not unique!')
+
+    # Columns of features are laid one after another, so traits come grouped by feature in order of the sheet
+    result = pd.DataFrame({
+        feature_column_name: np.repeat(features[trait_columns], len(values)),
+        trait_column_name: values[:, trait_columns].T.ravel(),
+        weights_column_name: pd.to_numeric(values[:, weight_columns].T.ravel())
+    })
+
+    return result[result[trait_column_name].notna()].reset_index(drop=True)
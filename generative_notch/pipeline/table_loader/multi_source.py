@@ -0,0 +1,56 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+from attrs import define, field
+import pandas as pd
+from .table_loader import TableLoader, clean_table
+from .csv import CSVTableLoader
+from .google_sheets import GoogleSheetsTableLoader
+
+
+@define
+class MultiSourceTableLoader(TableLoader):
+    """
+    Loads rarity table split into several sources, e.g. one worksheet per feature family, and concatenates them
+    in order of the sources. Sources are loaded concurrently on a thread pool, so the load takes about as long
+    as the slowest source. Every source is cleaned separately, so blank cells are never filled from another source.
+
+    :param sources: table loaders or CSV filepaths
+    :param max_workers: count of threads, one per source by default
+    """
+    sources: list[Union[TableLoader, str]] = field()
+    @sources.validator
+    def __sources_validator(self, _, val: list):
+        if not val:
+            raise ValueError('At least one source has to be given!')
+
+    max_workers: Optional[int] = None
+
+    @classmethod
+    def from_worksheets(cls, google_sheets_config: dict, worksheets: Optional[list[str]] = None, **kwargs):
+        """
+        :param worksheets: names of worksheets of the sheet, `worksheets` of the config by default
+        """
+        return cls(
+            sources=[
+                GoogleSheetsTableLoader(google_sheets_config={**google_sheets_config, 'worksheet': worksheet})
+                for worksheet in worksheets or google_sheets_config['worksheets']
+            ],
+            **kwargs
+        )
+
+    def run(self) -> pd.DataFrame:
+        loaders = [CSVTableLoader(filepath=source) if isinstance(source, str) else source for source in self.sources]
+        logging.info(f'Loading {len(loaders)} sources of the rarity table...')
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(loaders)) as executor:
+            tables = list(executor.map(lambda loader: clean_table(loader.run()), loaders))
+
+        for loader, table in zip(loaders, tables):
+            if list(table.columns) != list(tables[0].columns):
+                raise ValueError(
+                    f'Columns {list(table.columns)} of {loader} do not match columns {list(tables[0].columns)} '
+                    f'of {loaders[0]}!'
+                )
+
+        return pd.concat(tables, ignore_index=True)
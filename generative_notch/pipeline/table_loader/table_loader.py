@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 import pandas as pd
 
 
@@ -9,3 +10,26 @@ class TableLoader(ABC):
     @abstractmethod
     def run(self) -> pd.DataFrame:
         pass
+
+
+class StreamingTableLoader(TableLoader):
+    """
+    Loads data in chunks, so that tables not fitting in memory (e.g. precomputed combinations) can be processed
+    chunk by chunk. Every chunk is indexed by positions of its rows in the whole table.
+    """
+    @abstractmethod
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        pass
+
+    def run(self) -> pd.DataFrame:
+        return pd.concat(list(self.iter_chunks()))
+
+
+def clean_table(df: pd.DataFrame, fill_merged_cells: bool = True) -> pd.DataFrame:
+    """
+    Drops empty rows and columns and fills merged cells (left blank in every row but the first) from above.
+
+    :param fill_merged_cells: disable for multiindex layouts, in which blank cells pad features with fewer traits
+    """
+    result = df.dropna(axis=0, how='all').dropna(axis=1, how='all')
+    return result.ffill() if fill_merged_cells else result
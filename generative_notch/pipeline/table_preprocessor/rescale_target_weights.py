@@ -1,31 +1,34 @@
 from attrs import define
 import pandas as pd
-from generative_notch import get_config
-from .table_preprocessor import TablePreprocessor
+from .table_preprocessor import ColumnTablePreprocessor
 
 
 @define
-class NormalizeWeightsTablePreprocessor(TablePreprocessor):
+class NormalizeWeightsTablePreprocessor(ColumnTablePreprocessor):
     """
     Re-scale target weights to range 0:1 in secluded feature groups
     """
 
     table_config: dict
 
-    def run(self, df: pd.DataFrame) -> pd.DataFrame:
-        return normalize_weights_in_groups(
-            df=df,
-            group_column_name=self.table_config['feature_column_name'],
-            weights_column_name=self.table_config['weights_column_name']
-        )
+    def transform(self, df: pd.DataFrame) -> dict[str, pd.Series]:
+        return {
+            self.table_config['weights_column_name']: normalize_weights(
+                df=df,
+                group_column_name=self.table_config['feature_column_name'],
+                weights_column_name=self.table_config['weights_column_name']
+            )
+        }
+
+
+def normalize_weights(df: pd.DataFrame, group_column_name: str, weights_column_name: str) -> pd.Series:
+    """
+    Divides weights by the sum of weights of their group, in a single vectorized pass over the table.
+    :returns: normalized weights, aligned with the table
+    """
+    group_sums = df.groupby(group_column_name, sort=False, observed=True)[weights_column_name].transform('sum')
+    return df[weights_column_name] / group_sums
 
 
 def normalize_weights_in_groups(df: pd.DataFrame, group_column_name: str, weights_column_name: str) -> pd.DataFrame:
-    return (
-        df
-        .assign(**{weights_column_name: lambda d: d
-                .groupby(group_column_name)
-                [weights_column_name]
-                .apply(lambda x: x / x.sum())}
-        )
-    )
+    return df.assign(**{weights_column_name: normalize_weights(df, group_column_name, weights_column_name)})
@@ -9,3 +9,45 @@ class TablePreprocessor(ABC):
     @abstractmethod
     def run(self, df: pd.DataFrame) -> pd.DataFrame:
         pass
+
+
+class ColumnTablePreprocessor(TablePreprocessor):
+    """
+    Preprocessor which only replaces or adds whole columns, computed in a vectorized way from the table.
+    It declares the new columns instead of building a new table, so a chain of such preprocessors is applied
+    to a single shallow copy of the table, copying neither the table nor the columns left untouched.
+    """
+    @abstractmethod
+    def transform(self, df: pd.DataFrame) -> dict[str, pd.Series]:
+        """
+        :param df: table to read from, must not be modified
+        :returns: new values of columns, by column name
+        """
+        pass
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.assign(**self.transform(df))
+
+
+def apply_preprocessors(table: pd.DataFrame, preprocessors: list[TablePreprocessor]) -> pd.DataFrame:
+    """
+    Applies preprocessors sequentially with copy-on-write semantics: columns computed by column preprocessors
+    are set on a shallow copy of the table, the given table is deep-copied only before the first preprocessor
+    which is not a column preprocessor, as it may modify the table in place.
+    :returns: preprocessed table, the given table is left unchanged
+    """
+    result = table
+    owned = False
+    for preprocessor in preprocessors:
+        if isinstance(preprocessor, ColumnTablePreprocessor):
+            columns = preprocessor.transform(result)
+            if result is table:
+                result = table.copy(deep=False)
+            for column, values in columns.items():
+                # Setting a whole column replaces it, arrays shared with the given table are never written to
+                result[column] = values
+        else:
+            result = preprocessor.run(result if owned else result.copy())
+            owned = True
+
+    return result
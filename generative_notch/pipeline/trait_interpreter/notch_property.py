@@ -1,9 +1,9 @@
 from typing import Type, Optional
-from .trait_interpreter import TraitInterpreter
+from .trait_interpreter import PassthroughTraitInterpreter
 from ..trait_assembler.notch import TraitAssembler, NotchTraitAssembler
 
 
-class NotchPropertyTraitInterpreter(TraitInterpreter):
+class NotchPropertyTraitInterpreter(PassthroughTraitInterpreter):
     """
     Passthrough interpreter intended to work with NotchAssembler.
 
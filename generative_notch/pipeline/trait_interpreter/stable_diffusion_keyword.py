@@ -1,9 +1,9 @@
 from typing import Type, Optional
-from .trait_interpreter import TraitInterpreter
+from .trait_interpreter import PassthroughTraitInterpreter
 from ..trait_assembler.stable_diffusion import TraitAssembler, StableDiffusionTraitAssembler
 
 
-class StableDiffusionKeywordTraitInterpreter(TraitInterpreter):
+class StableDiffusionKeywordTraitInterpreter(PassthroughTraitInterpreter):
     """
     Passthrough interpreter intended to work with StableDiffusionAssembler.
     """
@@ -1,5 +1,7 @@
 import logging
-from typing import Type, Tuple, Optional
+import numpy as np
+import pandas as pd
+from typing import Type, Tuple, Optional, ClassVar
 from abc import ABC, abstractmethod
 from attrs import define, field
 from attrs.validators import instance_of
@@ -37,22 +39,51 @@ class TraitInterpreter(ABC):
     compatible_assembler: Type[TraitAssembler]
     assembly_instructions: list[dict] = field(factory=list, init=False)
 
+    # Whether traits can be interpreted column by column with `interpret_column()`, which requires the interpreter
+    # not to depend on other traits of the combination; otherwise traits are passed to `run()` row by row
+    columnar: ClassVar[bool] = False
+
     def run(self, feature_name: str, trait_value: str) -> None:
         """
         :param feature_name: name of a feature, needs to match the provided config
         :param trait_value: value of a trait: needs to match the provided config
         """
+        if not self.handles(feature_name):
+            logging.warning(f'This interpreter does not implement [{self.compatible_keyword}] action keyword!')
+            return
+
+        self.dispatch(feature_name, trait_value)
+
+    def handles(self, feature_name: str) -> bool:
+        """
+        :returns: whether action of the feature in config is the compatible keyword of this interpreter
+        """
         if feature_name not in self.config:
             raise ValueError(f'Given feature [{feature_name}] does not exist in provided config!')
         elif 'action' not in self.config[feature_name]:
             raise KeyError(f'Ill-formed feature config - it needs to implement [action] key with compatible keyword!')
-        elif self.config[feature_name]['action'] != self.compatible_keyword:
-            logging.warning(f'This interpreter does not implement [{self.compatible_keyword}] action keyword!')
-            return
 
+        return self.config[feature_name]['action'] == self.compatible_keyword
+
+    def dispatch(self, feature_name: str, trait_value: str) -> None:
+        """
+        Same as `run()`, without checking the config, for features already known to be handled by this interpreter.
+        """
         if instruction := self.interpret(trait_value, self.config[feature_name]):
             self.assembly_instructions.append(instruction)
 
+    def interpret_column(self, feature_name: str, traits: pd.Series) -> list[Optional[dict]]:
+        """
+        Interprets all traits of the feature at once, used instead of `run()` by columnar interpreters.
+        Falls back to interpreting every trait separately.
+
+        :param feature_name: name of a feature, handled by this interpreter
+        :param traits: traits of the feature, one per combination
+        :return: optional assembly instruction of every trait, in order of the traits
+        """
+        feature_properties = self.config[feature_name]
+        return [self.interpret(trait_value, feature_properties) for trait_value in traits]
+
     @abstractmethod
     def interpret(self, trait_value: str, feature_properties: dict) -> Optional[dict]:
         """
@@ -78,3 +109,32 @@ class TraitInterpreter(ABC):
         """
 
         return self.compatible_assembler, self.assembly_instructions
+
+
+class PassthroughTraitInterpreter(TraitInterpreter):
+    """
+    Interpreter whose instruction depends only on the trait and the feature config, so every distinct trait
+    of a column is interpreted once and its instruction is shared by all combinations with that trait.
+    Shared instructions must not be modified by assemblers.
+    """
+    columnar: ClassVar[bool] = True
+
+    def interpret_column(self, feature_name: str, traits: pd.Series) -> list[Optional[dict]]:
+        """
+        Traits of categorical columns (decoded from an encoded rarity table) are looked up by their codes,
+        only traits present in the column are interpreted.
+        """
+        feature_properties = self.config[feature_name]
+        if isinstance(traits.dtype, pd.CategoricalDtype) and not traits.hasnans:
+            codes, categories = traits.cat.codes.to_numpy(), traits.cat.categories
+            present = np.unique(codes)
+            instructions = np.empty(len(categories), dtype=object)
+            instructions[present] = [
+                self.interpret(trait_value, feature_properties) for trait_value in categories.take(present)
+            ]
+            return instructions.take(codes).tolist()
+
+        codes, uniques = pd.factorize(traits, use_na_sentinel=False)
+        instructions = np.empty(len(uniques), dtype=object)
+        instructions[:] = [self.interpret(trait_value, feature_properties) for trait_value in uniques]
+        return instructions.take(codes).tolist()
@@ -0,0 +1,61 @@
+import argparse
+import logging
+from time import perf_counter
+import pandas as pd
+from generative_notch import init_logger
+from generative_notch.pipeline.table_loader.csv import CSVTableLoader
+from generative_notch.pipeline.table_preprocessor.rescale_target_weights import NormalizeWeightsTablePreprocessor
+from generative_notch.pipeline.combination_generator.target_weight_based import TargetWeightBasedCombinationGenerator
+
+TABLE_CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+init_logger(logging.INFO)
+
+parser = argparse.ArgumentParser(description='Compares greedy generation variants against the single-process one')
+parser.add_argument('rarity_table')
+parser.add_argument('-count', '--n', dest='count', type=int, default=1000)
+parser.add_argument('--engine', default='numpy')
+parser.add_argument('--processes', type=int, default=4)
+parser.add_argument('--picks-per-pass', dest='picks_per_pass', type=int, default=8)
+parser.add_argument('--pool-size', dest='pool_size', type=int, default=4096)
+args = parser.parse_args()
+
+rarity_table = NormalizeWeightsTablePreprocessor(table_config=TABLE_CONFIG).run(
+    CSVTableLoader(filepath=args.rarity_table).run()
+)
+
+variants = {
+    'single-process': {},
+    f'{args.processes} processes': {'processes': args.processes},
+    f'{args.picks_per_pass} picks per pass': {'picks_per_pass': args.picks_per_pass},
+    f'pool of {args.pool_size} candidates': {'engine': 'pool', 'pool_size': args.pool_size}
+}
+
+results = {}
+for name, options in variants.items():
+    generator = TargetWeightBasedCombinationGenerator(
+        n=args.count,
+        save_filepath='',
+        table_config=TABLE_CONFIG,
+        **{'engine': args.engine, **options}
+    )
+    start = perf_counter()
+    generator.run(rarity_table)
+    error = generator.report['weight_difference'].abs()
+    results[name] = {
+        'seconds': perf_counter() - start,
+        'max distribution error': error.max(),
+        'mean distribution error': error.mean()
+    }
+
+report = pd.DataFrame(results).T
+baseline = report.loc['single-process']
+report = report.assign(
+    speedup=baseline['seconds'] / report['seconds'],
+    error_delta=report['mean distribution error'] - baseline['mean distribution error']
+)
+print(report.to_string())
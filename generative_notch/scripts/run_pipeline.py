@@ -41,6 +41,9 @@ result = (
     #         table_config=config['table']
     #     )
     # )
+    # .tablePreprocessor.encode(
+    #     table_config=config['table']
+    # )
     # .combinationGenerator.set(
     #     TargetWeightBasedCombinationGenerator(
     #         n=args.count,
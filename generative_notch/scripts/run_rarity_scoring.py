@@ -0,0 +1,25 @@
+import argparse
+import logging
+import pandas as pd
+from generative_notch import init_logger
+from generative_notch.pipeline.table_loader.csv import CSVTableLoader
+from generative_notch.pipeline.rarity_scorer.rarity_scorer import RarityScorer
+
+TABLE_CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+init_logger(logging.INFO)
+
+parser = argparse.ArgumentParser(description='Scores and ranks rarity of every token of a generated collection')
+parser.add_argument('rarity_table')
+parser.add_argument('combinations', help='CSV file of generated combinations, one column per feature')
+parser.add_argument('output', help='.parquet, .feather or .csv file to write scores to')
+args = parser.parse_args()
+
+RarityScorer(table_config=TABLE_CONFIG, save_filepath=args.output).run(
+    combinations=pd.read_csv(args.combinations),
+    rarity_table=CSVTableLoader(filepath=args.rarity_table).run()
+)
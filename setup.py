@@ -10,5 +10,9 @@ setup(
     version='0.2.0',
     author='Thomas Winged',
     install_requires=req,
+    extras_require={
+        'plot': ['seaborn~=0.11.2', 'matplotlib~=3.6.2'],
+        'arrow': ['pyarrow>=10.0']
+    },
     packages=find_packages()
 )
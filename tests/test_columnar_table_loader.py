@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import importlib.util
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from generative_notch.pipeline.table_loader.columnar import ColumnarTableLoader, write_columnar_table
+
+COMBINATIONS_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'combinations.csv')
+PYARROW_INSTALLED = importlib.util.find_spec('pyarrow') is not None
+
+
+class TestColumnarTableLoader(unittest.TestCase):
+    def test_invalid_path(self):
+        with self.assertRaises(FileNotFoundError):
+            ColumnarTableLoader(filepath='not_existing_file.parquet')
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            ColumnarTableLoader(filepath=COMBINATIONS_FILEPATH)
+        with self.assertRaises(ValueError):
+            write_columnar_table(pd.read_csv(COMBINATIONS_FILEPATH), 'combinations.xlsx')
+
+    @unittest.skipUnless(PYARROW_INSTALLED, 'pyarrow is not installed')
+    def test_round_trip(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in ('.parquet', '.feather', '.arrow'):
+                for memory_map in (True, False):
+                    filepath = os.path.join(directory, f'combinations{extension}')
+                    write_columnar_table(combinations, filepath)
+                    result = ColumnarTableLoader(filepath=filepath, memory_map=memory_map).run()
+
+                    self.assertTrue((result.dtypes == 'category').all())
+                    assert_frame_equal(result.astype(object), combinations.astype(object))
+
+    @unittest.skipUnless(PYARROW_INSTALLED, 'pyarrow is not installed')
+    def test_index_is_preserved(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        with tempfile.TemporaryDirectory() as directory:
+            for index in (pd.RangeIndex(100, 100 + len(combinations)), pd.Index(range(len(combinations)))[::-1]):
+                for extension in ('.parquet', '.feather', '.arrow'):
+                    filepath = os.path.join(directory, f'combinations{extension}')
+                    write_columnar_table(combinations.set_axis(index), filepath)
+                    result = ColumnarTableLoader(filepath=filepath).run()
+
+                    assert_frame_equal(result.astype(object), combinations.set_axis(index).astype(object))
+
+    @unittest.skipUnless(PYARROW_INSTALLED, 'pyarrow is not installed')
+    def test_numeric_columns(self):
+        table = pd.DataFrame({'trait_name': ['a', 'b'], 'target_weight': [0.25, 0.75]})
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'table.feather')
+            write_columnar_table(table, filepath)
+            result = ColumnarTableLoader(filepath=filepath).run()
+
+        assert_frame_equal(result, table.astype({'trait_name': 'category'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
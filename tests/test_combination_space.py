@@ -0,0 +1,118 @@
+import os
+import unittest
+from itertools import product
+import numpy as np
+import pandas as pd
+from generative_notch.pipeline.combination_generator.combination_space import CombinationSpace
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+COMBINATIONS_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'combinations.csv')
+
+
+def load_space() -> CombinationSpace:
+    return CombinationSpace.from_rarity_table(
+        rarity_table=pd.read_csv(RARITY_TABLE_FILEPATH),
+        feature_column_name='feature_name',
+        trait_column_name='trait_name',
+        weights_column_name='target_weight'
+    )
+
+
+class TestCombinationSpace(unittest.TestCase):
+    def test_size(self):
+        self.assertEqual(load_space().size, 1296)
+
+    def test_huge_space_is_not_allocated(self):
+        space = CombinationSpace(
+            features=[f'F{i}' for i in range(12)],
+            traits=[np.array([f't{j}' for j in range(10)], dtype=object) for _ in range(12)],
+            target_weights=[np.ones(10) for _ in range(12)]
+        )
+        self.assertEqual(space.size, 10 ** 12)
+
+        code = 123_456_789_012
+        indices = space.decode(code)
+        self.assertEqual(list(indices), [int(digit) for digit in str(code)])
+        self.assertEqual(space.encode(indices), code)
+        self.assertEqual(space.decode_range(space.size - 2, space.size + 5).shape, (2, 12))
+
+    def test_decode_matches_product_order(self):
+        space = load_space()
+        expected = pd.DataFrame(list(product(*space.traits)), columns=space.features)
+        decoded = space.to_frame(space.decode(np.arange(space.size)))
+
+        self.assertTrue(decoded.equals(expected))
+
+    def test_encode_decode_round_trip(self):
+        space = load_space()
+        codes = np.array([0, 7, 512, space.size - 1])
+
+        self.assertTrue((space.encode(space.decode(codes)) == codes).all())
+
+    def test_indices_from_frame(self):
+        space = load_space()
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        indices = space.indices_from_frame(combinations)
+
+        self.assertTrue(space.to_frame(indices).equals(combinations[space.features]))
+
+    def test_unknown_trait(self):
+        space = load_space()
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH).assign(Color='Purple')
+
+        with self.assertRaises(ValueError):
+            space.indices_from_frame(combinations)
+
+    def test_zero_weight_traits_are_dropped(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        rarity_table.loc[rarity_table.trait_name == 'alien', 'target_weight'] = 0.0
+        space = CombinationSpace.from_rarity_table(
+            rarity_table=rarity_table,
+            feature_column_name='feature_name',
+            trait_column_name='trait_name',
+            weights_column_name='target_weight'
+        )
+
+        self.assertEqual(list(space.traits[4]), ['dwarf', 'barbie'])
+        self.assertEqual(space.size, 864)
+
+    def test_compatibility_rules(self):
+        space = CombinationSpace.from_rarity_table(
+            rarity_table=pd.read_csv(RARITY_TABLE_FILEPATH),
+            feature_column_name='feature_name',
+            trait_column_name='trait_name',
+            weights_column_name='target_weight',
+            rules=[
+                {'Holding': 'stick', 'Clan': 'dwarf'},
+                {'Clan': 'dwarf', 'Holding': ['axe', 'missing trait']},
+                {'Scale': 'Big', 'Power': '3-5'}
+            ]
+        )
+        self.assertEqual(sorted(space.masks), [(0, 6), (4, 5)])
+        self.assertEqual(space.masks[(4, 5)].tolist()[0], [False, False, True, True])
+
+        product_indices = space.decode(np.arange(space.size))
+        compatible = space.is_compatible(product_indices)
+        frame = space.to_frame(product_indices)
+        forbidden = (
+            (frame.Clan == 'dwarf') & frame.Holding.isin(['stick', 'axe'])
+            | (frame.Scale == 'Big') & (frame.Power == '3-5')
+        )
+        self.assertEqual(compatible.tolist(), (~forbidden).tolist())
+        self.assertEqual(space.compatible_size, int(compatible.sum()))
+        self.assertEqual(space.compatible_codes().tolist(), np.flatnonzero(compatible).tolist())
+
+    def test_invalid_compatibility_rules(self):
+        for rules in ([{'Clan': 'dwarf'}], [{'Clan': 'dwarf', 'Unknown': 'stick'}]):
+            with self.assertRaises(ValueError):
+                CombinationSpace.from_rarity_table(
+                    rarity_table=pd.read_csv(RARITY_TABLE_FILEPATH),
+                    feature_column_name='feature_name',
+                    trait_column_name='trait_name',
+                    weights_column_name='target_weight',
+                    rules=rules
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,14 @@
+import os
+import tempfile
 import unittest
 import pandas as pd
 from pandas.testing import assert_frame_equal
-from generative_notch.pipeline.table_loader.csv import CSVTableLoader
+from generative_notch.pipeline.pipeline import Pipeline
+from generative_notch.pipeline.table_loader.csv import CSVTableLoader, ChunkedCSVTableLoader
 
 
 CSV_FILEPATH = r'D:\git\generative_notch\tests\data\rarity_table.csv'
+COMBINATIONS_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'combinations.csv')
 
 
 class TestCSVTableLoader(unittest.TestCase):
@@ -31,5 +35,33 @@ class TestCSVTableLoader(unittest.TestCase):
         )
 
 
+class TestChunkedCSVTableLoader(unittest.TestCase):
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            ChunkedCSVTableLoader(filepath=COMBINATIONS_FILEPATH, chunk_size=0)
+
+    def test_iter_chunks(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        chunks = list(ChunkedCSVTableLoader(filepath=COMBINATIONS_FILEPATH, chunk_size=4).iter_chunks())
+
+        self.assertListEqual([len(chunk) for chunk in chunks], [4, 4, 4, 3])
+        assert_frame_equal(pd.concat(chunks), combinations)
+
+    def test_id_column(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'combinations.csv')
+            combinations.assign(token_id=range(100, 100 + len(combinations))).to_csv(filepath, index=False)
+            result = ChunkedCSVTableLoader(filepath=filepath, chunk_size=4, id_column='token_id').run()
+
+        self.assertListEqual(result.index.tolist(), list(range(100, 100 + len(combinations))))
+        self.assertListEqual(list(result.columns), list(combinations.columns))
+
+    def test_pipeline_streams_chunks(self):
+        pipeline = Pipeline().tableLoader.set(ChunkedCSVTableLoader(filepath=COMBINATIONS_FILEPATH, chunk_size=4))
+        self.assertTrue(pipeline.tableLoader.is_streaming)
+        self.assertEqual(len(list(pipeline.tableLoader.iter())), 4)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,137 @@
+import os
+import unittest
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from generative_notch.pipeline.encoded_table import EncodedRarityTable, Vocabulary
+from generative_notch.pipeline.pipeline import Pipeline
+from generative_notch.pipeline.table_loader.csv import CSVTableLoader
+from generative_notch.pipeline.table_preprocessor.rescale_target_weights import NormalizeWeightsTablePreprocessor
+from generative_notch.pipeline.combination_generator.combination_space import CombinationSpace
+from generative_notch.pipeline.combination_generator.target_weight_based import TargetWeightBasedCombinationGenerator
+from generative_notch.pipeline.combination_generator.weighted_random import WeightedRandomCombinationGenerator
+from generative_notch.pipeline.combination_generator.quota_based import QuotaBasedCombinationGenerator
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+COMBINATIONS_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'combinations.csv')
+TABLE_CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+
+def load_encoded_table() -> EncodedRarityTable:
+    return EncodedRarityTable.from_rarity_table(pd.read_csv(RARITY_TABLE_FILEPATH), **TABLE_CONFIG)
+
+
+class TestEncodedRarityTable(unittest.TestCase):
+    def test_round_trip(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        result = load_encoded_table().to_frame(**TABLE_CONFIG)
+
+        self.assertTrue((result[['feature_name', 'trait_name']].dtypes == 'category').all())
+        self.assertEqual(result.target_weight.dtype, np.float32)
+        assert_frame_equal(
+            result.astype({'feature_name': object, 'trait_name': object, 'target_weight': np.float64}),
+            rarity_table,
+            check_exact=False, rtol=1e-6
+        )
+
+    def test_memory(self):
+        encoded = load_encoded_table()
+        self.assertEqual(len(encoded), len(pd.read_csv(RARITY_TABLE_FILEPATH)))
+        self.assertEqual(encoded.feature_codes.dtype, np.uint8)
+        self.assertEqual(encoded.trait_codes.dtype, np.int8)
+        self.assertLess(encoded.nbytes, pd.read_csv(RARITY_TABLE_FILEPATH).memory_usage(deep=True).sum())
+
+    def test_feature_weights(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        encoded = load_encoded_table()
+        for feature, group in rarity_table.groupby('feature_name', sort=False):
+            np.testing.assert_allclose(encoded.feature_weights(feature), group.target_weight.to_numpy(), rtol=1e-6)
+            np.testing.assert_array_equal(
+                encoded.vocabulary.traits[encoded.vocabulary.feature_code(feature)], group.trait_name
+            )
+
+    def test_duplicated_traits(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        with self.assertRaises(ValueError):
+            EncodedRarityTable.from_rarity_table(pd.concat([rarity_table, rarity_table.head(1)]), **TABLE_CONFIG)
+        with self.assertRaises(ValueError):
+            Vocabulary(features=['A'], traits=[np.array(['a', 'a'], dtype=object)])
+
+    def test_combinations(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        vocabulary = load_encoded_table().vocabulary
+        codes = vocabulary.encode_combinations(combinations)
+
+        self.assertEqual(codes.shape, combinations.shape)
+        assert_frame_equal(vocabulary.decode_combinations(codes).astype(object), combinations)
+
+        with self.assertRaises(ValueError):
+            vocabulary.encode_combinations(combinations.assign(**{combinations.columns[0]: 'not existing trait'}))
+        with self.assertRaises(KeyError):
+            vocabulary.feature_code('not existing feature')
+
+    def test_generator_on_encoded_table(self):
+        rarity_table = NormalizeWeightsTablePreprocessor(table_config=TABLE_CONFIG).run(
+            pd.read_csv(RARITY_TABLE_FILEPATH)
+        )
+        encoded_table = EncodedRarityTable.from_rarity_table(rarity_table, **TABLE_CONFIG).to_frame(**TABLE_CONFIG)
+        generators = [
+            TargetWeightBasedCombinationGenerator(
+                n=100, save_filepath='', table_config=TABLE_CONFIG, engine=engine, seed=0
+            )
+            for engine in ('pandas', 'numpy', 'search', 'pool')
+        ] + [
+            WeightedRandomCombinationGenerator(n=100, save_filepath='', table_config=TABLE_CONFIG, seed=0),
+            QuotaBasedCombinationGenerator(n=100, save_filepath='', table_config=TABLE_CONFIG, seed=0)
+        ]
+
+        for generator in generators:
+            result = generator.run(encoded_table)
+            expected = generator.run(rarity_table.astype({'target_weight': np.float32}))
+
+            self.assertTrue((result.dtypes == 'category').all(), generator)
+            self.assertTrue((expected.dtypes == object).all(), generator)
+            assert_frame_equal(result.astype(object), expected)
+
+    def test_space_from_encoded_table(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        encoded = EncodedRarityTable.from_rarity_table(rarity_table, **TABLE_CONFIG)
+        space = CombinationSpace.from_rarity_table(encoded.to_frame(**TABLE_CONFIG), **TABLE_CONFIG)
+        expected = CombinationSpace.from_rarity_table(rarity_table, **TABLE_CONFIG)
+
+        self.assertListEqual(space.features, expected.features)
+        for traits, expected_traits in zip(space.traits, expected.traits):
+            np.testing.assert_array_equal(traits, expected_traits)
+        for weights, expected_weights in zip(space.target_weights, expected.target_weights):
+            np.testing.assert_allclose(weights, expected_weights, rtol=1e-6)
+
+    def test_encoded_from_categorical_columns(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        encoded = load_encoded_table()
+        result = EncodedRarityTable.from_rarity_table(encoded.to_frame(**TABLE_CONFIG).iloc[::-1], **TABLE_CONFIG)
+
+        self.assertListEqual(result.vocabulary.features, list(rarity_table.feature_name.unique()[::-1]))
+        with self.assertRaises(ValueError):
+            EncodedRarityTable.from_rarity_table(rarity_table.assign(trait_name=None), **TABLE_CONFIG)
+
+    def test_pipeline_encodes_preprocessed_table(self):
+        pipeline = (
+            Pipeline()
+            .tableLoader.set(CSVTableLoader(filepath=RARITY_TABLE_FILEPATH))
+            .tablePreprocessor.register(NormalizeWeightsTablePreprocessor(table_config=TABLE_CONFIG))
+            .tablePreprocessor.encode(table_config=dict(TABLE_CONFIG, layout='single'))
+        )
+        result = pipeline.tablePreprocessor.run(pipeline.tableLoader.run())
+
+        self.assertIsNotNone(pipeline.tablePreprocessor.encoded)
+        self.assertEqual(result.target_weight.dtype, np.float32)
+        self.assertListEqual(pipeline.tablePreprocessor.encoded.vocabulary.features, list(result.feature_name.unique()))
+        self.assertIsNone(Pipeline().tablePreprocessor.encoded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import pandas as pd
+from generative_notch.pipeline.combination_generator.combination_space import CombinationSpace
+from generative_notch.pipeline.combination_generator.generation_state import GenerationState
+from generative_notch.pipeline.combination_generator.exclusion import BloomFilter, load_excluded_codes
+
+SPACE = CombinationSpace(
+    features=['A', 'B'],
+    traits=[np.array(['a1', 'a2'], dtype=object), np.array(['b1', 'b2', 'b3'], dtype=object)],
+    target_weights=[np.array([0.5, 0.5]), np.array([0.5, 0.25, 0.25])]
+)
+
+
+class TestExclusion(unittest.TestCase):
+    def test_bloom_filter(self):
+        bloom = BloomFilter.from_capacity(10000, 0.01)
+        added = np.arange(0, 20000, 2, dtype=np.int64)
+        bloom.update(added)
+
+        self.assertTrue(bloom.contains_many(added).all())
+        self.assertIn(42, bloom)
+        self.assertLess(bloom.contains_many(added + 1).mean(), 0.02)
+
+    def test_bloom_filter_huge_codes(self):
+        bloom = BloomFilter.from_capacity(10, 0.001)
+        bloom.add(2 ** 80 + 3)
+
+        self.assertIn(2 ** 80 + 3, bloom)
+        self.assertNotIn(2 ** 80 + 4, bloom)
+
+    def test_invalid_false_positive_rate(self):
+        with self.assertRaises(ValueError):
+            BloomFilter.from_capacity(10, 1.5)
+
+    def test_load_excluded_codes(self):
+        collection = pd.DataFrame({'A': ['a2', 'a1', 'a2', 'a9'], 'B': ['b3', 'b1', 'b3', 'b1'], 'C': [1, 2, 3, 4]})
+        self.assertEqual(load_excluded_codes(SPACE, [collection]).tolist(), [0, 5])
+        self.assertEqual(len(load_excluded_codes(SPACE, [])), 0)
+
+        with self.assertRaises(ValueError):
+            load_excluded_codes(SPACE, [collection.drop(columns='B')])
+
+    def test_exclude(self):
+        for false_positive_rate in (None, 0.001):
+            state = GenerationState(space=SPACE, capacity=2)
+            state.exclude([0, 5], false_positive_rate)
+            state.add([0, 1])
+
+            self.assertIn(0, state.used)
+            self.assertIn(1, state.used)
+            self.assertNotIn(2, state.used)
+            self.assertEqual(len(state.used), 1)
+            self.assertEqual(state.used.contains_many(np.arange(6)).tolist(), [True, True, False, False, False, True])
+            self.assertEqual([list(counts) for counts in state.counts], [[1, 0], [0, 1, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from generative_notch.pipeline.combination_generator.combination_space import CombinationSpace
+from generative_notch.pipeline.combination_generator.generation_state import GenerationState, UsedBitmap
+
+SPACE = CombinationSpace(
+    features=['A', 'B'],
+    traits=[np.array(['a1', 'a2'], dtype=object), np.array(['b1', 'b2', 'b3'], dtype=object)],
+    target_weights=[np.array([0.5, 0.5]), np.array([0.5, 0.25, 0.25])]
+)
+
+
+class TestGenerationState(unittest.TestCase):
+    def test_add(self):
+        state = GenerationState(space=SPACE, capacity=3)
+        state.add([0, 1])
+        state.add([1, 1])
+
+        self.assertEqual(state.size, 2)
+        self.assertEqual([list(counts) for counts in state.counts], [[1, 1], [0, 2, 0]])
+        self.assertIn(1, state.used)
+        self.assertIn(4, state.used)
+        self.assertNotIn(0, state.used)
+
+    def test_weight_differences(self):
+        state = GenerationState(space=SPACE, capacity=2)
+        self.assertEqual([list(d) for d in state.weight_differences()], [[0.5, 0.5], [0.5, 0.25, 0.25]])
+
+        state.add([0, 0])
+        state.add([0, 1])
+        self.assertEqual([list(d) for d in state.weight_differences()], [[-0.5, 0.5], [0.0, -0.25, 0.25]])
+
+    def test_pair_counts(self):
+        state = GenerationState(space=SPACE, capacity=4, track_pairs=True)
+        state.add([0, 1])
+        state.extend([[1, 2], [1, 1]])
+
+        self.assertEqual(state.pair_counts[(0, 1)].tolist(), [[0, 1, 0], [0, 1, 1]])
+        self.assertEqual(
+            np.round(state.pair_differences()[(0, 1)], 6).tolist(),
+            np.round([[0.25, 0.125 - 1 / 3, 0.125], [0.25, 0.125 - 1 / 3, 0.125 - 1 / 3]], 6).tolist()
+        )
+        self.assertEqual(GenerationState(space=SPACE, capacity=1).pair_counts, {})
+
+    def test_capacity(self):
+        state = GenerationState(space=SPACE, capacity=1)
+        state.add([0, 0])
+
+        with self.assertRaises(IndexError):
+            state.add([0, 1])
+
+    def test_to_frame(self):
+        state = GenerationState(space=SPACE, capacity=5)
+        state.add([1, 2])
+
+        self.assertEqual(state.to_frame().values.tolist(), [['a2', 'b3']])
+
+    def test_save_and_load(self):
+        state = GenerationState(space=SPACE, capacity=4, error_every=1)
+        state.add([0, 1])
+        state.add([1, 2])
+        rng = np.random.default_rng(3)
+        rng.random(10)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'checkpoint.npz')
+            state.save(filepath, rng=rng)
+            restored_rng = np.random.default_rng(0)
+            restored = GenerationState.load(filepath, space=SPACE, capacity=4, rng=restored_rng)
+
+        self.assertEqual(restored.indices().tolist(), [[0, 1], [1, 2]])
+        self.assertEqual([list(counts) for counts in restored.counts], [[1, 1], [0, 1, 1]])
+        self.assertIn(5, restored.used)
+        self.assertEqual(restored_rng.random(), rng.random())
+        pd.testing.assert_frame_equal(restored.distribution_error(), state.distribution_error())
+
+    def test_used_bitmap(self):
+        bitmap = UsedBitmap(20)
+        bitmap.add(3)
+        bitmap.add(17)
+
+        self.assertIn(17, bitmap)
+        self.assertNotIn(16, bitmap)
+        self.assertEqual(len(bitmap), 2)
+        self.assertEqual(bitmap.contains_many(np.array([3, 4, 17])).tolist(), [True, False, True])
+
+    def test_huge_space_uses_hash_set(self):
+        space = CombinationSpace(
+            features=[f'F{i}' for i in range(20)],
+            traits=[np.array(['t0', 't1', 't2', 't3', 't4'], dtype=object) for _ in range(20)],
+            target_weights=[np.full(5, 0.2) for _ in range(20)]
+        )
+        state = GenerationState(space=space, capacity=1)
+
+        self.assertIsInstance(state.used, set)
+
+
+if __name__ == '__main__':
+    unittest.main()
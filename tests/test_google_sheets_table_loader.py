@@ -1,4 +1,8 @@
+import os
+import tempfile
 import unittest
+import gspread
+from attrs import define, field
 from generative_notch.pipeline.table_loader.google_sheets import GoogleSheetsTableLoader
 
 
@@ -8,6 +12,76 @@ CONFIG = {
     'sheet': 'generative_notch-rarity_table',
     'worksheet': 'DEBUG'
 }
+WORKSHEET_VALUES = [
+    ['feature_name', 'trait_name', 'target_weight'],
+    ['A', 'aa', '1'],
+    ['', 'aaa', '11'],
+    ['', '', ''],
+    ['B', 'bb', '2'],
+    ['', 'bbb', '22'],
+    ['C', 'cc', '3'],
+    ['', 'ccc', '33']
+]
+
+
+@define
+class FakeSpreadsheet:
+    """
+    Stand-in of gspread spreadsheet with a single worksheet, serving values the way Sheets API does.
+    """
+    values: list[list[str]]
+    modified_time: str = '2023-01-01T00:00:00.000Z'
+    downloads: int = 0
+    titles: list[str] = field(factory=lambda: [CONFIG['worksheet']])
+
+    def worksheet(self, title: str) -> 'FakeWorksheet':
+        if title not in self.titles:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return FakeWorksheet(spreadsheet=self, title=title)
+
+    def values_get(self, title: str, params: dict = None) -> dict:
+        self.downloads += 1
+        return {'values': self.values}
+
+
+@define
+class FakeWorksheet:
+    spreadsheet: FakeSpreadsheet
+    title: str
+
+    @property
+    def row_count(self) -> int:
+        return len(self.spreadsheet.values)
+
+    @property
+    def col_count(self) -> int:
+        return len(self.spreadsheet.values[0])
+
+
+@define
+class FakeClient:
+    """
+    Stand-in of authorized gspread client, raising ConnectionError for every request when offline.
+    """
+    spreadsheet: FakeSpreadsheet
+    offline: bool = False
+    authorizations: int = 0
+
+    def __call__(self, filename: str) -> 'FakeClient':
+        self.authorizations += 1
+        return self
+
+    def list_spreadsheet_files(self, title: str) -> list[dict]:
+        self.__assert_online()
+        return [{'id': 'id', 'name': CONFIG['sheet'], 'modifiedTime': self.spreadsheet.modified_time}]
+
+    def open(self, title: str) -> FakeSpreadsheet:
+        self.__assert_online()
+        return self.spreadsheet
+
+    def __assert_online(self):
+        if self.offline:
+            raise ConnectionError('Network is unreachable')
 
 
 class TestGoogleSheetsTableLoader(unittest.TestCase):
@@ -25,5 +99,72 @@ class TestGoogleSheetsTableLoader(unittest.TestCase):
         self.assertEqual(table.to_csv(index=False), CORRECT_RESULT)
 
 
+class TestGoogleSheetsTableLoaderCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = {**CONFIG, 'cache_dir': os.path.join(self.directory.name, 'cache')}
+        self.client = FakeClient(spreadsheet=FakeSpreadsheet(values=WORKSHEET_VALUES))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load(self):
+        return GoogleSheetsTableLoader(google_sheets_config=self.config, client_factory=self.client).run()
+
+    def test_run(self):
+        self.assertEqual(self.load().to_csv(index=False, lineterminator='\r\n'), CORRECT_RESULT)
+
+    def test_unchanged_sheet_is_not_downloaded(self):
+        self.load()
+        table = self.load()
+
+        self.assertEqual(table.to_csv(index=False, lineterminator='\r\n'), CORRECT_RESULT)
+        self.assertEqual(self.client.spreadsheet.downloads, 1)
+
+    def test_changed_sheet_is_downloaded(self):
+        self.load()
+        self.client.spreadsheet.values = WORKSHEET_VALUES[:3]
+        self.client.spreadsheet.modified_time = '2023-01-02T00:00:00.000Z'
+
+        self.assertEqual(len(self.load()), 2)
+        self.assertEqual(self.client.spreadsheet.downloads, 2)
+
+    def test_offline(self):
+        self.client.offline = True
+        with self.assertRaises(ConnectionError):
+            self.load()
+
+        self.client.offline = False
+        self.load()
+        self.client.offline = True
+        self.assertEqual(self.load().to_csv(index=False, lineterminator='\r\n'), CORRECT_RESULT)
+
+    def test_missing_worksheet_is_not_loaded_from_cache(self):
+        self.load()
+        self.client.spreadsheet.titles = []
+        self.client.spreadsheet.modified_time = '2023-01-02T00:00:00.000Z'
+        with self.assertRaises(gspread.exceptions.WorksheetNotFound):
+            self.load()
+
+    def test_cache_depends_on_filling_merged_cells(self):
+        filled = self.load()
+        unfilled = GoogleSheetsTableLoader(
+            google_sheets_config=self.config, client_factory=self.client, fill_merged_cells=False
+        ).run()
+
+        self.assertEqual(filled.feature_name.isna().sum(), 0)
+        self.assertEqual(unfilled.feature_name.isna().sum(), 3)
+        self.assertEqual(self.client.spreadsheet.downloads, 2)
+        self.assertEqual(self.load().feature_name.isna().sum(), 0)
+        self.assertEqual(self.client.spreadsheet.downloads, 2)
+
+    def test_client_is_authorized_once(self):
+        loader = GoogleSheetsTableLoader(google_sheets_config=self.config, client_factory=self.client)
+        loader.run()
+        loader.run()
+
+        self.assertEqual(self.client.authorizations, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from generative_notch.pipeline.table_loader.csv import CSVTableLoader
+from generative_notch.pipeline.table_loader.table_loader import clean_table
+from generative_notch.pipeline.table_loader.layout import LayoutTableLoader, parse_table_layout
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+HORIZONTAL_INPUT = (
+    'A,,B,\n'
+    'trait_name,target_weight,trait_name,target_weight\n'
+    'aa,1.0,bb,2.0\n'
+    'aaa,11.0,bbb,22.0\n'
+    ',,bbbb,3.0\n'
+)
+VERTICAL_INPUT = (
+    'A,trait_name,aa,aaa,\n'
+    ',target_weight,1.0,11.0,\n'
+    'B,trait_name,bb,bbb,bbbb\n'
+    ',target_weight,2.0,22.0,3.0\n'
+)
+CORRECT_RESULT = pd.DataFrame({
+    'feature_name': ['A', 'A', 'B', 'B', 'B'],
+    'trait_name': ['aa', 'aaa', 'bb', 'bbb', 'bbbb'],
+    'target_weight': [1.0, 11.0, 2.0, 22.0, 3.0]
+})
+CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+
+class TestLayoutTableLoader(unittest.TestCase):
+    def test_horizontal(self):
+        table = pd.read_csv(StringIO(HORIZONTAL_INPUT))
+        result = parse_table_layout(table, {**CONFIG, 'layout': 'multiindex_horizontal'})
+        assert_frame_equal(result, CORRECT_RESULT)
+
+    def test_vertical(self):
+        table = pd.read_csv(StringIO(VERTICAL_INPUT))
+        result = parse_table_layout(table, {**CONFIG, 'layout': 'multiindex_vertical'})
+        assert_frame_equal(result, CORRECT_RESULT)
+
+    def test_single(self):
+        table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        self.assertIs(parse_table_layout(table, {**CONFIG, 'layout': 'single'}), table)
+        self.assertIs(parse_table_layout(table, CONFIG), table)
+
+    def test_cleaned_table(self):
+        table = clean_table(pd.read_csv(StringIO(HORIZONTAL_INPUT)), fill_merged_cells=False)
+        assert_frame_equal(parse_table_layout(table, {**CONFIG, 'layout': 'multiindex_horizontal'}), CORRECT_RESULT)
+
+    def test_rarity_table_round_trip(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        groups = [group.reset_index(drop=True) for _, group in rarity_table.groupby('feature_name', sort=False)]
+        wide = pd.concat([group[['trait_name', 'target_weight']] for group in groups], axis=1)
+        # Feature names written only above the first of their columns, as in merged cells of a worksheet
+        header = ','.join(f'{group.feature_name[0]},' for group in groups)
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'rarity_table.csv')
+            with open(filepath, 'w', newline='') as file:
+                file.write(f'{header}\n')
+                wide.to_csv(file, index=False, lineterminator='\n')
+            result = LayoutTableLoader(
+                loader=CSVTableLoader(filepath=filepath),
+                table_config={**CONFIG, 'layout': 'multiindex_horizontal'}
+            ).run()
+
+        assert_frame_equal(result, rarity_table.astype({'trait_name': object}))
+
+    def test_invalid_layout(self):
+        with self.assertRaises(ValueError):
+            LayoutTableLoader(
+                loader=CSVTableLoader(filepath=RARITY_TABLE_FILEPATH),
+                table_config={**CONFIG, 'layout': 'diagonal'}
+            )
+
+    def test_missing_weights_column(self):
+        with self.assertRaises(ValueError):
+            parse_table_layout(
+                pd.read_csv(StringIO(HORIZONTAL_INPUT)).iloc[:, :3],
+                {**CONFIG, 'layout': 'multiindex_horizontal'}
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import time
+import tempfile
+import unittest
+from attrs import define
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from generative_notch.pipeline.table_loader.table_loader import TableLoader
+from generative_notch.pipeline.table_loader.multi_source import MultiSourceTableLoader
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+
+
+@define
+class SlowTableLoader(TableLoader):
+    """
+    Stand-in of a remote source, returning the table after a delay.
+    """
+    table: pd.DataFrame
+    delay: float
+
+    def run(self) -> pd.DataFrame:
+        time.sleep(self.delay)
+        return self.table
+
+
+class TestMultiSourceTableLoader(unittest.TestCase):
+    def test_run(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        features = rarity_table.feature_name.unique()
+        with tempfile.TemporaryDirectory() as directory:
+            filepaths = []
+            for i, family in enumerate([features[:3], features[3:]]):
+                filepaths.append(os.path.join(directory, f'family_{i}.csv'))
+                family_table = rarity_table[rarity_table.feature_name.isin(family)]
+                # Feature is written only in its first row, as in merged cells of a worksheet
+                family_table.assign(
+                    feature_name=family_table.feature_name.where(family_table.feature_name.ne(
+                        family_table.feature_name.shift()
+                    ))
+                ).to_csv(filepaths[-1], index=False)
+
+            result = MultiSourceTableLoader(sources=filepaths).run()
+
+        assert_frame_equal(result, rarity_table)
+
+    def test_sources_are_loaded_concurrently(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        loader = MultiSourceTableLoader(sources=[SlowTableLoader(table=rarity_table, delay=0.5) for _ in range(4)])
+
+        start = time.perf_counter()
+        result = loader.run()
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertEqual(len(result), 4 * len(rarity_table))
+
+    def test_blank_cells_are_not_filled_from_another_source(self):
+        first = pd.DataFrame({'feature_name': ['A', None], 'trait_name': ['a', 'aa'], 'target_weight': [1.0, 2.0]})
+        second = pd.DataFrame({'feature_name': [None, 'B'], 'trait_name': ['b', 'bb'], 'target_weight': [1.0, 2.0]})
+        result = MultiSourceTableLoader(sources=[
+            SlowTableLoader(table=first, delay=0), SlowTableLoader(table=second, delay=0)
+        ]).run()
+
+        self.assertListEqual(result.feature_name.tolist(), ['A', 'A', None, 'B'])
+
+    def test_mismatched_columns(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        with self.assertRaises(ValueError):
+            MultiSourceTableLoader(sources=[
+                SlowTableLoader(table=rarity_table, delay=0),
+                SlowTableLoader(table=rarity_table.rename(columns={'trait_name': 'trait'}), delay=0)
+            ]).run()
+
+    def test_no_sources(self):
+        with self.assertRaises(ValueError):
+            MultiSourceTableLoader(sources=[])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import logging
+import unittest
+import numpy as np
+import pandas as pd
+from generative_notch.pipeline.combination_generator.quota_based import QuotaBasedCombinationGenerator, apportion
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+
+def create_generator(n: int, seed: int = 0) -> QuotaBasedCombinationGenerator:
+    return QuotaBasedCombinationGenerator(
+        n=n,
+        save_filepath='',
+        table_config=CONFIG,
+        seed=seed
+    )
+
+
+class TestQuotaBasedCombinationGenerator(unittest.TestCase):
+    def test_apportion(self):
+        self.assertEqual(apportion(np.array([1.0, 1.0, 1.0]), 10).tolist(), [4, 3, 3])
+        self.assertEqual(apportion(np.array([3.0, 0.5, 1.0]), 9).tolist(), [6, 1, 2])
+        self.assertEqual(apportion(np.array([0.25, 0.75]), 0).tolist(), [0, 0])
+
+    def test_exact_marginals(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        count = 200
+        generator = create_generator(count)
+        result = generator.run(rarity_table)
+
+        self.assertEqual(len(result), count)
+        self.assertFalse(result.duplicated().any())
+
+        report = generator.report
+        trait_counts = report.current_weight * count
+        target_counts = report.target_weight * count
+        self.assertTrue(((trait_counts - target_counts).abs() < 1 + 1e-9).all())
+        self.assertTrue(np.allclose(trait_counts, trait_counts.round()))
+
+    def test_seed(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        self.assertTrue(create_generator(300, seed=5).run(rarity_table).equals(
+            create_generator(300, seed=5).run(rarity_table)
+        ))
+
+    def test_all_combinations(self):
+        result = create_generator(-1).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        self.assertEqual(len(result), 1296)
+        self.assertFalse(result.duplicated().any())
+
+    def test_large_collection(self):
+        rarity_table = pd.DataFrame(
+            [(f'F{i}', f't{j}', float(j + 1)) for i in range(10) for j in range(8)],
+            columns=['feature_name', 'trait_name', 'target_weight']
+        )
+        count = 100000
+        generator = create_generator(count)
+        result = generator.run(rarity_table)
+
+        self.assertEqual(len(result), count)
+        self.assertFalse(result.duplicated().any())
+        self.assertLess((generator.report.weight_difference.abs() * count).max(), 1 + 1e-6)
+
+    def test_compatibility_rules(self):
+        result = QuotaBasedCombinationGenerator(
+            n=300,
+            save_filepath='',
+            table_config={**CONFIG, 'rules': [{'Clan': 'dwarf', 'Holding': ['stick', 'axe']}]},
+            seed=0
+        ).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        self.assertEqual(len(result), 300)
+        self.assertFalse(result.duplicated().any())
+        self.assertFalse((result.Clan.eq('dwarf') & result.Holding.isin(['stick', 'axe'])).any())
+
+    def test_excluded_collections(self):
+        series_1 = create_generator(n=600).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+        for n in (600, -1):
+            generator = create_generator(n=n, seed=1)
+            generator.excluded_collections = [series_1]
+            series_2 = generator.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+            self.assertEqual(len(series_2), 600 if n > 0 else 696)
+            self.assertFalse(series_2.duplicated().any())
+            self.assertTrue(series_2.merge(series_1).empty)
+
+    def test_unreachable_quotas(self):
+        with self.assertLogs(level=logging.WARNING):
+            result = create_generator(1000).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        self.assertEqual(len(result), 1000)
+        self.assertFalse(result.duplicated().any())
+
+    def test_nearly_full_space(self):
+        weights = {'F0': [2, 0, 1], 'F1': [4, 1, 3, 4], 'F2': [2, 2], 'F3': [2, 1, 0, 3]}
+        rarity_table = pd.DataFrame(
+            [(feature, f'{feature}_{i}', weight) for feature, values in weights.items() for i, weight in enumerate(values)],
+            columns=list(CONFIG.values())
+        )
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                result = create_generator(45, seed=seed).run(rarity_table)
+
+                self.assertEqual(len(result), 45)
+                self.assertFalse(result.duplicated().any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from generative_notch.pipeline.rarity_scorer.rarity_scorer import RarityScorer, rank_descending
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+COMBINATIONS_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'combinations.csv')
+CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+
+class TestRarityScorer(unittest.TestCase):
+    def test_scores_match_row_wise_computation(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        result = RarityScorer(table_config=CONFIG).run(combinations, pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        frequencies = {
+            feature: combinations[feature].value_counts(normalize=True) for feature in combinations.columns
+        }
+        for row, token in combinations.iterrows():
+            token_frequencies = [frequencies[feature][trait] for feature, trait in token.items()]
+            self.assertAlmostEqual(result.loc[row, 'rarity_score'], sum(1 / f for f in token_frequencies))
+            self.assertAlmostEqual(result.loc[row, 'statistical_rarity'], np.prod(token_frequencies))
+            self.assertAlmostEqual(
+                result.loc[row, 'harmonic_rarity'], len(token_frequencies) / sum(1 / f for f in token_frequencies)
+            )
+
+        expected_ranks = result['rarity_score'].rank(method='min', ascending=False).astype(np.int64)
+        self.assertListEqual(result['rarity_score_rank'].tolist(), expected_ranks.tolist())
+        expected_ranks = result['statistical_rarity'].rank(method='min', ascending=True).astype(np.int64)
+        self.assertListEqual(result['statistical_rarity_rank'].tolist(), expected_ranks.tolist())
+
+    def test_trait_frequencies(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        scorer = RarityScorer(table_config=CONFIG)
+        scorer.run(combinations, pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        frequencies = scorer.trait_frequencies.set_index(['feature', 'trait'])['frequency']
+        self.assertAlmostEqual(frequencies['Clan', 'dwarf'], (combinations['Clan'] == 'dwarf').mean())
+        self.assertTrue(np.allclose(scorer.trait_frequencies.groupby('feature')['frequency'].sum(), 1))
+
+    def test_rank_descending_ties(self):
+        self.assertListEqual(rank_descending(np.array([1., 3., 3., 2.])).tolist(), [4, 1, 1, 3])
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'scores.csv')
+            result = RarityScorer(table_config=CONFIG, save_filepath=filepath).run(
+                pd.read_csv(COMBINATIONS_FILEPATH), pd.read_csv(RARITY_TABLE_FILEPATH)
+            )
+
+            saved = pd.read_csv(filepath)
+            self.assertListEqual(saved['rarity_score_rank'].tolist(), result['rarity_score_rank'].tolist())
+            self.assertTrue(os.path.exists(os.path.join(directory, 'scores.trait_frequencies.csv')))
+
+    def test_token_ids(self):
+        combinations = pd.read_csv(COMBINATIONS_FILEPATH)
+        combinations.index += 501
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = os.path.join(directory, 'scores.csv')
+            result = RarityScorer(table_config=CONFIG, save_filepath=filepath).run(
+                combinations, pd.read_csv(RARITY_TABLE_FILEPATH)
+            )
+            saved = pd.read_csv(filepath, index_col=0)
+
+        self.assertListEqual(result.index.tolist(), combinations.index.tolist())
+        self.assertListEqual(saved.index.tolist(), combinations.index.tolist())
+        pd.testing.assert_frame_equal(result[combinations.columns], combinations)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            RarityScorer(table_config=CONFIG, save_filepath='scores.xlsx').run(
+                pd.read_csv(COMBINATIONS_FILEPATH), pd.read_csv(RARITY_TABLE_FILEPATH)
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
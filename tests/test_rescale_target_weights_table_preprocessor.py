@@ -1,7 +1,9 @@
 import unittest
 from generative_notch import get_config
 from io import StringIO
+import numpy as np
 import pandas as pd
+from generative_notch.pipeline.table_preprocessor.table_preprocessor import TablePreprocessor, apply_preprocessors
 from generative_notch.pipeline.table_preprocessor.rescale_target_weights import NormalizeWeightsTablePreprocessor
 
 DEBUG_INPUT = 'feature_name,trait_name,target_weight\r\nA,aa,1.0\r\nA,aaa,11.0\r\nB,bb,2.0\r\nB,bbb,22.0\r\nC,cc,3.0\r\nC,ccc,33.0\r\n'
@@ -12,6 +14,16 @@ CONFIG = {
     'weights_column_name': 'target_weight'
 }
 
+
+class InPlaceTablePreprocessor(TablePreprocessor):
+    """
+    Preprocessor modifying the given table in place.
+    """
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        df['target_weight'] *= 2
+        return df
+
+
 class TestRescaleTargetWeightsTablePreprocessor(unittest.TestCase):
     def test_set_up(self):
         result = NormalizeWeightsTablePreprocessor(
@@ -27,6 +39,27 @@ class TestRescaleTargetWeightsTablePreprocessor(unittest.TestCase):
 
         self.assertEqual(result.to_csv(), CORRECT_RESULT)
 
+    def test_chain_is_copy_free(self):
+        table = pd.read_csv(StringIO(DEBUG_INPUT))
+        original = table.copy()
+        result = apply_preprocessors(table, [NormalizeWeightsTablePreprocessor(table_config=CONFIG)] * 5)
+
+        pd.testing.assert_frame_equal(table, original)
+        self.assertTrue(np.shares_memory(result.trait_name.to_numpy(), table.trait_name.to_numpy()))
+        np.testing.assert_allclose(result.groupby('feature_name').target_weight.sum(), 1.0)
+
+    def test_chain_protects_table_from_in_place_preprocessors(self):
+        table = pd.read_csv(StringIO(DEBUG_INPUT))
+        original = table.copy()
+        result = apply_preprocessors(table, [
+            NormalizeWeightsTablePreprocessor(table_config=CONFIG),
+            InPlaceTablePreprocessor(),
+            InPlaceTablePreprocessor()
+        ])
+
+        pd.testing.assert_frame_equal(table, original)
+        np.testing.assert_allclose(result.groupby('feature_name').target_weight.sum(), 4.0)
+
 
 if __name__ == '__main__':
     unittest.main()
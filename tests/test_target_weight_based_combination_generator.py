@@ -0,0 +1,396 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from generative_notch.pipeline.table_preprocessor.rescale_target_weights import normalize_weights_in_groups
+from generative_notch.pipeline.combination_generator.combination_space import CombinationSpace
+from generative_notch.pipeline.combination_generator.generation_state import GenerationState
+from generative_notch.pipeline.combination_generator.compatibility import IncompatibleCombinations
+from generative_notch.pipeline.combination_generator.target_weight_based import TargetWeightBasedCombinationGenerator, \
+    plan_shards, select_diverse_top_k
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+
+def generate(n: int, **kwargs) -> pd.DataFrame:
+    return TargetWeightBasedCombinationGenerator(
+        n=n,
+        save_filepath='',
+        table_config=CONFIG,
+        **kwargs
+    ).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+
+class TestTargetWeightBasedCombinationGenerator(unittest.TestCase):
+    def test_invalid_engine(self):
+        with self.assertRaises(ValueError):
+            TargetWeightBasedCombinationGenerator(n=1, save_filepath='', table_config=CONFIG, engine='invalid')
+
+    def test_too_many_combinations(self):
+        with self.assertRaises(ValueError):
+            generate(n=10000, engine='numpy')
+
+    def test_numpy_engine_matches_pandas_engine(self):
+        assert_frame_equal(
+            generate(n=40, engine='numpy'),
+            generate(n=40, engine='pandas')
+        )
+
+    def test_search_engine_matches_numpy_engine(self):
+        assert_frame_equal(
+            generate(n=300, engine='search'),
+            generate(n=300, engine='numpy')
+        )
+
+    def test_search_engine_matches_numpy_engine_on_random_tables(self):
+        rng = np.random.default_rng(0)
+        for table_id in range(60):
+            rarity_table = normalize_weights_in_groups(
+                df=pd.DataFrame(
+                    [
+                        (f'F{feature}', f't{trait}', float(rng.integers(1, 5)))
+                        for feature in range(rng.integers(2, 5)) for trait in range(rng.integers(2, 6))
+                    ],
+                    columns=['feature_name', 'trait_name', 'target_weight']
+                ),
+                group_column_name='feature_name',
+                weights_column_name='target_weight'
+            )
+            n = int(rng.integers(1, len(CombinationSpace.from_rarity_table(rarity_table, **CONFIG).compatible_codes())))
+            with self.subTest(table_id=table_id):
+                assert_frame_equal(
+                    *(
+                        TargetWeightBasedCombinationGenerator(
+                            n=n, save_filepath='', table_config=CONFIG, engine=engine
+                        ).run(rarity_table)
+                        for engine in ('search', 'numpy')
+                    )
+                )
+
+    def test_search_engine_huge_space(self):
+        rarity_table = pd.DataFrame(
+            [(f'F{i}', f't{j}', float(j + 1)) for i in range(12) for j in range(10)],
+            columns=['feature_name', 'trait_name', 'target_weight']
+        )
+        result = TargetWeightBasedCombinationGenerator(
+            n=50,
+            save_filepath='',
+            table_config=CONFIG,
+            engine='search'
+        ).run(rarity_table)
+
+        self.assertEqual(result.shape, (50, 12))
+        self.assertFalse(result.duplicated().any())
+
+    def test_plan_shards(self):
+        space = CombinationSpace.from_rarity_table(
+            rarity_table=pd.read_csv(RARITY_TABLE_FILEPATH),
+            feature_column_name='feature_name',
+            trait_column_name='trait_name',
+            weights_column_name='target_weight'
+        )
+        pivot, counts = plan_shards(space, 1000)
+
+        self.assertEqual(space.features[pivot], 'Holding')
+        self.assertEqual(counts.sum(), 1000)
+        self.assertTrue((counts <= space.size // 4).all())
+
+    def test_pandas_engine_in_multiple_processes(self):
+        with self.assertRaises(ValueError):
+            TargetWeightBasedCombinationGenerator(n=1, save_filepath='', table_config=CONFIG, engine='pandas',
+                                                  processes=2)
+
+    def test_multiple_processes(self):
+        generator = TargetWeightBasedCombinationGenerator(n=300, save_filepath='', table_config=CONFIG, processes=2)
+        result = generator.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+        sharded_error = generator.report.weight_difference.abs().mean()
+
+        generator.processes = 1
+        generator.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+        single_process_error = generator.report.weight_difference.abs().mean()
+
+        self.assertEqual(len(result), 300)
+        self.assertFalse(result.duplicated().any())
+        self.assertLess(sharded_error - single_process_error, 0.05)
+
+    def test_picks_per_pass(self):
+        with self.assertRaises(ValueError):
+            TargetWeightBasedCombinationGenerator(n=1, save_filepath='', table_config=CONFIG, engine='search',
+                                                  picks_per_pass=4)
+
+        rarity_table = normalize_weights_in_groups(pd.read_csv(RARITY_TABLE_FILEPATH), 'feature_name', 'target_weight')
+        generator = TargetWeightBasedCombinationGenerator(n=300, save_filepath='', table_config=CONFIG,
+                                                          picks_per_pass=8)
+        result = generator.run(rarity_table)
+        self.assertEqual(len(result), 300)
+        self.assertFalse(result.duplicated().any())
+
+        baseline = TargetWeightBasedCombinationGenerator(n=300, save_filepath='', table_config=CONFIG)
+        baseline.run(rarity_table)
+        self.assertLess(
+            generator.report['weight_difference'].abs().max() - baseline.report['weight_difference'].abs().max(),
+            0.05
+        )
+
+    def test_select_diverse_top_k(self):
+        score = np.array([5.0, 4.0, 4.0, 3.0, -np.inf])
+        codes = np.array([[0, 0], [0, 1], [1, 0], [1, 1], [1, 1]])
+        capacities = [np.array([1, 2]), np.array([2, 2])]
+
+        self.assertEqual(select_diverse_top_k(score, codes, 3, capacities).tolist(), [0, 2, 3])
+        self.assertEqual(select_diverse_top_k(score, codes, 10, capacities).tolist(), [0, 2, 3])
+        self.assertEqual([capacity.tolist() for capacity in capacities], [[1, 2], [2, 2]])
+
+    def test_pair_weight(self):
+        with self.assertRaises(ValueError):
+            TargetWeightBasedCombinationGenerator(n=1, save_filepath='', table_config=CONFIG, engine='search',
+                                                  pair_weight=1.0)
+
+        rarity_table = normalize_weights_in_groups(pd.read_csv(RARITY_TABLE_FILEPATH), 'feature_name', 'target_weight')
+        space = CombinationSpace.from_rarity_table(rarity_table, 'feature_name', 'trait_name', 'target_weight')
+        pair_errors = []
+        for pair_weight in (0.0, 1.0):
+            result = TargetWeightBasedCombinationGenerator(
+                n=300, save_filepath='', table_config=CONFIG, pair_weight=pair_weight
+            ).run(rarity_table)
+            state = GenerationState(space=space, capacity=300, track_pairs=True)
+            state.extend(space.indices_from_frame(result))
+            pair_errors.append(np.mean([np.abs(d).mean() for d in state.pair_differences().values()]))
+
+        self.assertLess(pair_errors[1], pair_errors[0] * 0.75)
+
+    def test_iter_combinations(self):
+        for engine in ('numpy', 'search', 'pandas'):
+            generator = TargetWeightBasedCombinationGenerator(n=25, save_filepath='', table_config=CONFIG,
+                                                              engine=engine)
+            batches = list(generator.iter_combinations(pd.read_csv(RARITY_TABLE_FILEPATH), batch_size=10))
+
+            self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+            self.assertEqual(list(batches[1].index), list(range(10, 20)))
+            assert_frame_equal(pd.concat(batches), generate(n=25, engine='numpy'))
+            self.assertIsNotNone(generator.report)
+
+    def test_resume_from_checkpoint(self):
+        for engine in ('numpy', 'search'):
+            with tempfile.TemporaryDirectory() as directory:
+                interrupted = TargetWeightBasedCombinationGenerator(
+                    n=60, save_filepath=directory, table_config=CONFIG, engine=engine, checkpoint_every=25
+                )
+                interrupted.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+                self.assertTrue(os.path.exists(os.path.join(directory, 'generation_checkpoint.npz')))
+
+                resumed = TargetWeightBasedCombinationGenerator(
+                    n=100, save_filepath=directory, table_config=CONFIG, engine=engine, resume=True
+                )
+                assert_frame_equal(resumed.run(pd.read_csv(RARITY_TABLE_FILEPATH)), generate(n=100, engine=engine))
+
+    def test_resumed_distribution_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            TargetWeightBasedCombinationGenerator(
+                n=60, save_filepath=directory, table_config=CONFIG, checkpoint_every=25, error_every=10
+            ).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+            resumed = TargetWeightBasedCombinationGenerator(
+                n=100, save_filepath=directory, table_config=CONFIG, error_every=10, resume=True
+            )
+            resumed.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        uninterrupted = TargetWeightBasedCombinationGenerator(
+            n=100, save_filepath='', table_config=CONFIG, error_every=10
+        )
+        uninterrupted.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        self.assertEqual(list(resumed.distribution_error.index), list(range(10, 101, 10)))
+        assert_frame_equal(resumed.distribution_error, uninterrupted.distribution_error)
+
+    def test_resume_with_different_table(self):
+        with tempfile.TemporaryDirectory() as directory:
+            TargetWeightBasedCombinationGenerator(
+                n=10, save_filepath=directory, table_config=CONFIG, checkpoint_every=5
+            ).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+            with self.assertRaises(ValueError):
+                TargetWeightBasedCombinationGenerator(
+                    n=10, save_filepath=directory, table_config=CONFIG, resume=True
+                ).run(pd.read_csv(RARITY_TABLE_FILEPATH).replace('alien', 'elf'))
+
+    def test_distribution_error(self):
+        for engine in ('numpy', 'pandas'):
+            generator = TargetWeightBasedCombinationGenerator(n=25, save_filepath='', table_config=CONFIG,
+                                                              engine=engine, error_every=10)
+            generator.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+            self.assertEqual(list(generator.distribution_error.index), [10, 20, 25])
+            self.assertEqual(
+                list(generator.distribution_error.columns),
+                ['Scale', 'Color', 'Visible', 'Profession', 'Clan', 'Holding', 'Power']
+            )
+            expected = (
+                generator.report['weight_difference'].abs()
+                .groupby(level='feature_name', sort=False).median()
+            )
+            self.assertEqual(generator.distribution_error.iloc[-1].tolist(), expected.tolist())
+
+    def test_distribution_error_artifact(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generator = TargetWeightBasedCombinationGenerator(n=30, save_filepath=directory, table_config=CONFIG)
+            generator.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+            artifact = pd.read_json(os.path.join(directory, 'distribution_error.json'), orient='records')
+            self.assertEqual(artifact['combinations count'].tolist(), list(range(1, 31)))
+            self.assertEqual(len(generator.distribution_error), 30)
+
+    def test_excluded_collections(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        with tempfile.TemporaryDirectory() as directory:
+            series_1_filepath = os.path.join(directory, 'series_1.csv')
+            generate(n=100, engine='numpy').to_csv(series_1_filepath, index=False)
+            series_1 = pd.read_csv(series_1_filepath)
+
+            for engine, processes in (('numpy', 1), ('search', 1), ('pandas', 1), ('numpy', 2)):
+                series_2 = TargetWeightBasedCombinationGenerator(
+                    n=100, save_filepath='', table_config=CONFIG, engine=engine, processes=processes,
+                    excluded_collections=[series_1_filepath]
+                ).run(rarity_table)
+
+                self.assertEqual(len(series_2), 100)
+                self.assertTrue(series_2.merge(series_1).empty)
+
+            remaining = TargetWeightBasedCombinationGenerator(
+                n=-1, save_filepath='', table_config=CONFIG, excluded_collections=[series_1]
+            ).run(rarity_table)
+            self.assertEqual(len(remaining), 1196)
+            self.assertTrue(remaining.merge(series_1).empty)
+
+            series_2 = TargetWeightBasedCombinationGenerator(
+                n=100, save_filepath='', table_config=CONFIG, excluded_collections=[series_1],
+                exclusion_false_positive_rate=0.001
+            ).run(rarity_table)
+            self.assertTrue(series_2.merge(series_1).empty)
+
+    def test_compatibility_rules(self):
+        config = {**CONFIG, 'rules': [{'Clan': 'dwarf', 'Holding': ['stick', 'axe']}, {'Scale': 'Big', 'Power': '3-5'}]}
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        results = [
+            TargetWeightBasedCombinationGenerator(
+                n=n, save_filepath='', table_config=config, engine=engine, processes=processes
+            ).run(rarity_table)
+            for engine, processes, n in (('pandas', 1, 40), ('numpy', 1, 40), ('search', 1, 40), ('numpy', 2, -1))
+        ]
+        assert_frame_equal(results[0], results[1])
+        assert_frame_equal(results[1], results[2])
+
+        for result in results:
+            self.assertFalse((result.Clan.eq('dwarf') & result.Holding.isin(['stick', 'axe'])).any())
+            self.assertFalse((result.Scale.eq('Big') & result.Power.eq('3-5')).any())
+        self.assertEqual(len(results[3]), 1296 - 216 - 216 + 36)
+
+    def test_rules_are_checked_once(self):
+        config = {**CONFIG, 'rules': [{'Clan': 'dwarf', 'Holding': ['stick', 'axe']}]}
+        patch = mock.patch.object(
+            IncompatibleCombinations, 'contains_many', autospec=True, side_effect=IncompatibleCombinations.contains_many
+        )
+        with patch as contains_many:
+            TargetWeightBasedCombinationGenerator(n=20, save_filepath='', table_config=config).run(
+                pd.read_csv(RARITY_TABLE_FILEPATH)
+            )
+
+        self.assertEqual(contains_many.call_count, 1)
+
+    def test_base_collection(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        for engine, n in (('numpy', 200), ('search', 200), ('pandas', 20)):
+            uninterrupted = generate(n=n + n // 2, engine=engine)
+            base = uninterrupted.iloc[:n].set_axis([f'token-{i}' for i in range(n)])
+            result = TargetWeightBasedCombinationGenerator(
+                n=n // 2, save_filepath='', table_config=CONFIG, engine=engine, base_collection=base
+            ).run(rarity_table)
+
+            assert_frame_equal(result.iloc[:n], base)
+            assert_frame_equal(result.iloc[n:], uninterrupted.iloc[n:], check_index_type=False)
+
+        with tempfile.TemporaryDirectory() as directory:
+            base_filepath = os.path.join(directory, 'base.csv')
+            generate(n=1000).to_csv(base_filepath, index=False)
+            result = TargetWeightBasedCombinationGenerator(
+                n=-1, save_filepath='', table_config=CONFIG, processes=2, base_collection=base_filepath
+            ).run(rarity_table)
+            self.assertEqual(len(result), 1296)
+            self.assertFalse(result.duplicated().any())
+
+    def test_base_collection_ids(self):
+        rarity_table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        base = generate(n=10).set_axis(range(1, 11))
+        for engine in ('numpy', 'search', 'pandas', 'pool'):
+            generator = TargetWeightBasedCombinationGenerator(
+                n=5, save_filepath='', table_config=CONFIG, engine=engine, base_collection=base
+            )
+            for result in (generator.run(rarity_table), pd.concat(list(generator.iter_combinations(rarity_table)))):
+                self.assertListEqual(result.index.tolist(), list(range(1, 16)), engine)
+
+    def test_pool_engine(self):
+        with self.assertRaises(ValueError):
+            TargetWeightBasedCombinationGenerator(n=1, save_filepath='', table_config=CONFIG, engine='pool',
+                                                  processes=2)
+        with self.assertRaises(ValueError):
+            TargetWeightBasedCombinationGenerator(n=1, save_filepath='', table_config=CONFIG, engine='pool',
+                                                  pool_size=0)
+
+        rarity_table = normalize_weights_in_groups(pd.read_csv(RARITY_TABLE_FILEPATH), 'feature_name', 'target_weight')
+        generator = TargetWeightBasedCombinationGenerator(n=300, save_filepath='', table_config=CONFIG, engine='pool',
+                                                          pool_size=256, seed=7)
+        result = generator.run(rarity_table)
+        self.assertEqual(len(result), 300)
+        self.assertFalse(result.duplicated().any())
+        assert_frame_equal(result, TargetWeightBasedCombinationGenerator(
+            n=300, save_filepath='', table_config=CONFIG, engine='pool', pool_size=256, seed=7
+        ).run(rarity_table))
+
+        baseline = TargetWeightBasedCombinationGenerator(n=300, save_filepath='', table_config=CONFIG)
+        baseline.run(rarity_table)
+        self.assertLess(
+            generator.distribution_error.iloc[-1].max() - baseline.distribution_error.iloc[-1].max(), 0.01
+        )
+
+    def test_pool_engine_huge_space(self):
+        rarity_table = pd.DataFrame(
+            [(f'F{i}', f't{j}', float(j + 1)) for i in range(24) for j in range(10)],
+            columns=['feature_name', 'trait_name', 'target_weight']
+        )
+        result = TargetWeightBasedCombinationGenerator(
+            n=50, save_filepath='', table_config=CONFIG, engine='pool', pool_size=128, seed=0
+        ).run(rarity_table)
+
+        self.assertEqual(result.shape, (50, 24))
+        self.assertFalse(result.duplicated().any())
+
+    def test_pool_engine_huge_space_with_rules(self):
+        rarity_table = pd.DataFrame(
+            [(f'F{i}', f't{j}', float(j + 1)) for i in range(24) for j in range(10)],
+            columns=['feature_name', 'trait_name', 'target_weight']
+        )
+        rules = [{'F0': ['t8', 't9'], 'F1': ['t8', 't9']}]
+        result = TargetWeightBasedCombinationGenerator(
+            n=50, save_filepath='', table_config={**CONFIG, 'rules': rules}, engine='pool', pool_size=128, seed=0
+        ).run(rarity_table)
+
+        self.assertEqual(result.shape, (50, 24))
+        self.assertFalse(result.duplicated().any())
+        self.assertFalse((result.F0.isin(['t8', 't9']) & result.F1.isin(['t8', 't9'])).any())
+
+    def test_numpy_engine_unique_combinations(self):
+        result = generate(n=-1, engine='numpy')
+        self.assertEqual(len(result), 1296)
+        self.assertFalse(result.duplicated().any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+from unittest import mock
+import pandas as pd
+from generative_notch.pipeline.pipeline import Pipeline, NotRegistered
+from generative_notch.pipeline.trait_interpreter.notch_property import NotchPropertyTraitInterpreter, NotchTraitAssembler
+from generative_notch.pipeline.trait_interpreter.stable_diffusion_keyword import (
+    StableDiffusionKeywordTraitInterpreter, StableDiffusionTraitAssembler
+)
+from generative_notch.pipeline.trait_interpreter.card_description_interpreter import CardDescriptionTraitInterpreter
+from generative_notch.pipeline.trait_interpreter.notch_range_property import NotchRangePropertyInterpreter
+
+CONFIG = {
+    'Color': {
+        'action': 'set_single_notch_property',
+        'node': '$F_Material1',
+        'property': 'Material, Colour',
+        'options': {
+            'Red': '1, 0, 0, 1',
+            'Green': '0, 1, 0, 1'
+        }
+    },
+    'Clan': {
+        'action': 'substitute_stable_diffusion_keyword',
+        'substitutes': 'clan'
+    },
+    'Profession': {
+        'action': 'substitute_stable_diffusion_keyword',
+        'substitutes': 'profession'
+    }
+}
+COMBINATIONS = pd.DataFrame({
+    'Color': ['Red', 'Green'],
+    'Clan': ['dwarf', 'elf'],
+    'Profession': ['viking', 'mage']
+})
+
+
+def create_pipeline() -> Pipeline:
+    return (
+        Pipeline()
+        .traitInterpreter.register(NotchPropertyTraitInterpreter(
+            compatible_assembler=NotchTraitAssembler,
+            compatible_keyword='set_single_notch_property',
+            config=CONFIG
+        ))
+        .traitInterpreter.register(StableDiffusionKeywordTraitInterpreter(
+            compatible_assembler=StableDiffusionTraitAssembler,
+            compatible_keyword='substitute_stable_diffusion_keyword',
+            config=CONFIG
+        ))
+    )
+
+
+class TestTraitInterpreterPipelineModule(unittest.TestCase):
+    def test_compile(self):
+        module = create_pipeline().traitInterpreter
+        plan = module.compile(COMBINATIONS.columns)
+
+        self.assertTupleEqual(plan['Color'], (module.interpreters[0],))
+        self.assertTupleEqual(plan['Clan'], (module.interpreters[1],))
+        self.assertIs(module.compile(COMBINATIONS.columns), plan)
+
+    def test_run(self):
+        result = create_pipeline().traitInterpreter.run(COMBINATIONS)
+
+        self.assertDictEqual(result[1], {
+            NotchTraitAssembler: [{'node': '$F_Material1', 'property': 'Material, Colour', 'value': '0, 1, 0, 1'}],
+            StableDiffusionTraitAssembler: [
+                {'word': 'elf', 'substitutes': 'clan'},
+                {'word': 'mage', 'substitutes': 'profession'}
+            ]
+        })
+
+    def test_traits_are_interpreted_once(self):
+        pipeline = create_pipeline()
+        combinations = pd.concat([COMBINATIONS] * 50, ignore_index=True)
+        patch = mock.patch.object(NotchPropertyTraitInterpreter, 'interpret', autospec=True, return_value=None)
+        with patch as interpret, self.assertNoLogs(level='WARNING'):
+            pipeline.traitInterpreter.run(combinations)
+
+        self.assertEqual(interpret.call_count, combinations.Color.nunique())
+
+    def test_columnar_matches_row_by_row(self):
+        pipeline = create_pipeline()
+        combinations = pd.concat([COMBINATIONS] * 3, ignore_index=True).astype('category')
+        result = pipeline.traitInterpreter.run(combinations)
+
+        for combination_id, combination in combinations.iterrows():
+            expected = {}
+            for interpreter in pipeline.traitInterpreter.interpreters:
+                for feature, trait in combination.items():
+                    interpreter.run(feature, trait)
+                assembler_type, instructions = interpreter.get_result()
+                expected[assembler_type] = list(instructions)
+                instructions.clear()
+
+            self.assertDictEqual(result[combination_id], expected)
+
+    def test_categorical_column(self):
+        interpreter = create_pipeline().traitInterpreter.interpreters[0]
+        # Categories not present in the column are not interpreted, "Blue" is missing in the config
+        traits = pd.Series(pd.Categorical(['Red', 'Red', 'Green'], categories=['Blue', 'Green', 'Red']))
+        result = interpreter.interpret_column('Color', traits)
+
+        self.assertListEqual(
+            [instruction['value'] for instruction in result], ['1, 0, 0, 1', '1, 0, 0, 1', '0, 1, 0, 1']
+        )
+        self.assertIs(result[0], result[1])
+
+    def test_row_by_row_fallback(self):
+        interpreter = NotchRangePropertyInterpreter(
+            compatible_assembler=NotchTraitAssembler,
+            compatible_keyword='set_single_notch_property_in_range',
+            config={'Power': {'action': 'set_single_notch_property_in_range', 'node': '$F_Text', 'property': 'Text'}}
+        )
+        result = interpreter.interpret_column('Power', pd.Series(['1-1', '2-2']))
+
+        self.assertFalse(interpreter.columnar)
+        self.assertListEqual([instruction['value'] for instruction in result], ['1', '2'])
+
+    def test_interpreters_sharing_action(self):
+        pipeline = create_pipeline().traitInterpreter.register(CardDescriptionTraitInterpreter(
+            compatible_assembler=NotchTraitAssembler,
+            compatible_keyword='substitute_stable_diffusion_keyword',
+            config=CONFIG
+        ))
+        result = pipeline.traitInterpreter.run(COMBINATIONS.head(1))
+
+        self.assertEqual(len(pipeline.traitInterpreter.compile(COMBINATIONS.columns)['Clan']), 2)
+        self.assertIn(
+            {'node': '$F_Description', 'property': 'Attributes, Text String', 'value': 'viking dwarf'},
+            result[0][NotchTraitAssembler]
+        )
+
+    def test_unhandled_action(self):
+        pipeline = Pipeline().traitInterpreter.register(NotchPropertyTraitInterpreter(
+            compatible_assembler=NotchTraitAssembler,
+            compatible_keyword='set_single_notch_property',
+            config=CONFIG
+        ))
+        with self.assertLogs(level='WARNING') as logs:
+            result = pipeline.traitInterpreter.run(pd.concat([COMBINATIONS] * 10, ignore_index=True))
+            pipeline.traitInterpreter.run(COMBINATIONS)
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertTupleEqual(pipeline.traitInterpreter.compile(COMBINATIONS.columns)['Clan'], ())
+        self.assertDictEqual(result[0], {
+            NotchTraitAssembler: [{'node': '$F_Material1', 'property': 'Material, Colour', 'value': '1, 0, 0, 1'}]
+        })
+
+    def test_unknown_feature(self):
+        with self.assertRaises(ValueError):
+            create_pipeline().traitInterpreter.run(COMBINATIONS.assign(Scale='Big'))
+
+    def test_no_interpreters(self):
+        with self.assertRaises(NotRegistered):
+            Pipeline().traitInterpreter.run(COMBINATIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
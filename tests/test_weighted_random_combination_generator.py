@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from generative_notch.pipeline.combination_generator.weighted_random import WeightedRandomCombinationGenerator, \
+    build_alias_table
+
+RARITY_TABLE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'rarity_table.csv')
+CONFIG = {
+    'feature_column_name': 'feature_name',
+    'trait_column_name': 'trait_name',
+    'weights_column_name': 'target_weight'
+}
+
+
+def create_generator(n: int, seed: int = 0) -> WeightedRandomCombinationGenerator:
+    return WeightedRandomCombinationGenerator(
+        n=n,
+        save_filepath='',
+        table_config=CONFIG,
+        seed=seed
+    )
+
+
+class TestWeightedRandomCombinationGenerator(unittest.TestCase):
+    def test_alias_table(self):
+        weights = np.array([1.0, 3.0, 0.5, 0.0, 2.5])
+        probability, alias = build_alias_table(weights)
+
+        # Probability of every index is its own kept share plus shares redirected to it by aliases
+        distribution = probability.copy()
+        np.add.at(distribution, alias, 1.0 - probability)
+        np.testing.assert_allclose(distribution / len(weights), weights / weights.sum())
+
+    def test_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            build_alias_table(np.array([0.0, 0.0]))
+
+    def test_seed(self):
+        table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        assert_frame_equal(create_generator(200, seed=1).run(table), create_generator(200, seed=1).run(table))
+
+    def test_unique_combinations(self):
+        result = create_generator(500).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        self.assertEqual(len(result), 500)
+        self.assertFalse(result.duplicated().any())
+
+    def test_too_many_draws(self):
+        generator = create_generator(-1)
+        generator.max_draws = 2
+
+        with self.assertRaises(RuntimeError):
+            generator.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+    def test_resume_from_checkpoint(self):
+        table = pd.read_csv(RARITY_TABLE_FILEPATH)
+        save = WeightedRandomCombinationGenerator.save
+
+        def crash_after_checkpoint(generator):
+            save(generator)
+            raise KeyboardInterrupt
+
+        with tempfile.TemporaryDirectory() as directory:
+            generator = create_generator(600)
+            generator.save_filepath = directory
+            generator.checkpoint_every = 1
+            with patch.object(WeightedRandomCombinationGenerator, 'save', crash_after_checkpoint):
+                with self.assertRaises(KeyboardInterrupt):
+                    generator.run(table)
+
+            generator.resume = True
+            assert_frame_equal(generator.run(table), create_generator(600).run(table))
+
+    def test_compatibility_rules(self):
+        result = WeightedRandomCombinationGenerator(
+            n=300,
+            save_filepath='',
+            table_config={**CONFIG, 'rules': [{'Clan': 'dwarf', 'Holding': ['stick', 'axe']}]},
+            seed=0
+        ).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        self.assertEqual(len(result), 300)
+        self.assertFalse(result.duplicated().any())
+        self.assertFalse((result.Clan.eq('dwarf') & result.Holding.isin(['stick', 'axe'])).any())
+
+    def test_excluded_collections(self):
+        series_1 = create_generator(n=300).run(pd.read_csv(RARITY_TABLE_FILEPATH))
+        generator = create_generator(n=300)
+        generator.excluded_collections = [series_1]
+        series_2 = generator.run(pd.read_csv(RARITY_TABLE_FILEPATH))
+
+        self.assertEqual(len(series_2), 300)
+        self.assertTrue(series_2.merge(series_1).empty)
+
+    def test_report(self):
+        rarity_table = pd.DataFrame(
+            [(f'F{i}', f't{j}', float(j + 1)) for i in range(10) for j in range(8)],
+            columns=['feature_name', 'trait_name', 'target_weight']
+        )
+        generator = create_generator(20000)
+        result = generator.run(rarity_table)
+
+        self.assertEqual(len(result), 20000)
+        self.assertFalse(result.duplicated().any())
+        self.assertEqual(list(generator.report.columns), ['target_weight', 'current_weight', 'weight_difference'])
+        self.assertLess(generator.report.weight_difference.abs().max(), 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()